@@ -9,6 +9,33 @@ def print_step(msg):
     print(f" {msg}")
     print(f"{'='*50}\n")
 
+def _latest_source_mtime(root: str) -> float:
+    """递归获取项目中 .py 源文件的最新修改时间（使用 os.scandir 减少开销）"""
+    latest = 0.0
+    stack = [root]
+    skip_dirs = {'build', 'dist', '.git', '__pycache__', 'venv', '.venv'}
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in skip_dirs:
+                        stack.append(entry.path)
+                elif entry.name.endswith('.py'):
+                    latest = max(latest, entry.stat().st_mtime)
+    return latest
+
+def is_build_up_to_date() -> bool:
+    """检查 exe 是否比 spec 文件及所有源文件都新（无需重新打包）"""
+    exe_file = Path("dist") / "FileRecorder.exe"
+    spec_file = Path("FileRecorder.spec")
+    if not exe_file.exists() or not spec_file.exists():
+        return False
+    
+    exe_mtime = exe_file.stat().st_mtime
+    if spec_file.stat().st_mtime >= exe_mtime:
+        return False
+    return _latest_source_mtime('.') < exe_mtime
+
 def clean_build_dirs():
     """清理构建目录"""
     print_step("1. 清理旧构建文件")
@@ -54,7 +81,8 @@ def setup_files():
     dst_config = dist_dir / "config.json"
     
     if src_config.exists():
-        shutil.copy2(src_config, dst_config)
+        # 仅复制内容即可（无需 copy2 的元数据复制）
+        dst_config.write_bytes(src_config.read_bytes())
         print(f"已创建默认配置: {dst_config}")
     else:
         print(f"警告: 找不到示例配置 {src_config}")
@@ -62,6 +90,11 @@ def setup_files():
 def main():
     print("开始自动构建 FileRecorder...")
     
+    # 增量构建：源文件未变化时跳过打包（--force 强制重新打包）
+    if '--force' not in sys.argv[1:] and is_build_up_to_date():
+        print("源文件未修改，可执行文件已是最新，跳过打包。(使用 --force 强制重新打包)")
+        return
+    
     clean_build_dirs()
     run_pyinstaller()
     setup_files()
@@ -5,6 +5,7 @@ https://github.com/Wangtengzhou/FileRecorder
 配置管理模块
 """
 import json
+import os
 import sys
 from pathlib import Path
 
@@ -29,7 +30,6 @@ class Config:
         },
         # 扫描配置
         "scanner": {
-            "timeout_seconds": 5,  # 网络路径超时
             "batch_size": 1000,    # 批量插入大小
             "ignore_patterns": [   # 忽略的文件/目录模式
                 ".*",              # 隐藏文件
@@ -46,8 +46,15 @@ class Config:
             "close_to_tray": None,              # None=未设置(每次询问), True=最小化到托盘, False=退出
             "close_behavior_remembered": False, # 是否记住关闭行为
             "theme": "auto"                     # auto=跟随系统, light=浅色, dark=深色
+        },
+        # 导出配置
+        "export": {
+            "html_compress": False  # HTML 导出时压缩内嵌数据（文件更小，需较新的浏览器打开）
         }
     }
+    # 默认配置的 JSON 快照：实例化时用 json.loads 还原出独立的深拷贝，
+    # 比 copy.deepcopy 快，且避免 _deep_update 修改到类级 DEFAULTS 的嵌套字典
+    _DEFAULTS_JSON = json.dumps(DEFAULTS)
     
     def __init__(self, config_path: str = None):
         """
@@ -69,25 +76,41 @@ class Config:
         else:
             self.config_path = self.base_dir / "config.json"
         
-        self._config = self.DEFAULTS.copy()
+        self._config = json.loads(self._DEFAULTS_JSON)
+        self._db_path_cache: Path | None = None  # database_path 缓存
+        self._flat: dict[tuple, object] = {}     # 键路径 -> 值 的扁平索引
+        self._rebuild_index()
         self.load()
     
     def load(self) -> None:
         """从文件加载配置"""
-        if self.config_path.exists():
-            try:
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    saved_config = json.load(f)
-                    self._deep_update(self._config, saved_config)
-            except (json.JSONDecodeError, IOError) as e:
-                # 使用 print 而非 logger，因为 config.py 在 logger 之前加载
-                print(f"加载配置失败: {e}，使用默认配置")
+        # 文件不存在或为空时直接使用默认配置，无需打开和解析
+        try:
+            if os.stat(self.config_path).st_size == 0:
+                return
+        except OSError:
+            return
+        
+        try:
+            saved_config = json.loads(self.config_path.read_bytes())
+            self._deep_update(self._config, saved_config)
+            self._db_path_cache = None
+            self._rebuild_index()
+        except (json.JSONDecodeError, UnicodeDecodeError, IOError) as e:
+            # 使用 print 而非 logger，因为 config.py 在 logger 之前加载
+            print(f"加载配置失败: {e}，使用默认配置")
     
     def save(self) -> None:
-        """保存配置到文件"""
+        """保存配置到文件（先写临时文件再原子替换，避免读到半写入的配置）"""
         self.config_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.config_path, 'w', encoding='utf-8') as f:
-            json.dump(self._config, f, indent=4, ensure_ascii=False)
+        tmp_path = self.config_path.with_suffix(self.config_path.suffix + '.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._config, f, indent=4, ensure_ascii=False)
+            os.replace(tmp_path, self.config_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
     
     def get(self, *keys, default=None):
         """
@@ -100,13 +123,7 @@ class Config:
         Returns:
             配置值或默认值
         """
-        value = self._config
-        for key in keys:
-            if isinstance(value, dict) and key in value:
-                value = value[key]
-            else:
-                return default
-        return value
+        return self._flat.get(keys, default)
     
     def set(self, *keys, value) -> None:
         """
@@ -125,24 +142,51 @@ class Config:
                 config[key] = {}
             config = config[key]
         config[keys[-1]] = value
+        self._rebuild_index()
+        
+        # 数据库路径变更时使缓存失效
+        if keys[:2] == ("database", "path") or keys == ("database",):
+            self._db_path_cache = None
+    
+    def _rebuild_index(self) -> None:
+        """重建扁平键路径索引，使 get() 只需一次字典查找"""
+        flat = {(): self._config}
+        stack = [((), self._config)]
+        while stack:
+            prefix, node = stack.pop()
+            for key, value in node.items():
+                path = prefix + (key,)
+                flat[path] = value
+                if isinstance(value, dict):
+                    stack.append((path, value))
+        self._flat = flat
     
     def _deep_update(self, base: dict, update: dict) -> None:
-        """深度更新字典"""
-        for key, value in update.items():
-            if key in base and isinstance(base[key], dict) and isinstance(value, dict):
-                self._deep_update(base[key], value)
-            else:
-                base[key] = value
+        """深度更新字典（显式栈迭代，避免深层嵌套时的递归开销）"""
+        stack = [(base, update)]
+        while stack:
+            b, u = stack.pop()
+            for key, value in u.items():
+                b_value = b.get(key)
+                if isinstance(b_value, dict) and isinstance(value, dict):
+                    stack.append((b_value, value))
+                else:
+                    b[key] = value
     
-    @property
-    def database_path(self) -> Path:
-        """获取数据库完整路径"""
-        db_path = self.get("database", "path")
-        path = Path(db_path)
+    def _compute_db_path(self) -> Path:
+        """计算数据库完整路径（相对路径基于程序目录）"""
+        path = Path(self.get("database", "path"))
         if not path.is_absolute():
             path = self.base_dir / path
         return path
     
+    @property
+    def database_path(self) -> Path:
+        """获取数据库完整路径（缓存结果，修改 database.path 时失效）"""
+        if self._db_path_cache is None:
+            self._db_path_cache = self._compute_db_path()
+        return self._db_path_cache
+    
     @property
     def ai_configured(self) -> bool:
         """检查AI是否已配置"""
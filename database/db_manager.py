@@ -4,16 +4,83 @@ https://github.com/Wangtengzhou/FileRecorder
 
 数据库管理模块 - 使用 SQLite 存储文件索引信息
 """
+import json
 import sqlite3
+import threading
+import weakref
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import contextmanager
-from functools import lru_cache
 
 from logger import get_logger
 
 logger = get_logger("database")
 
+# 文件记录插入语句（固定文本，便于 sqlite3 语句缓存复用已编译的语句）
+_INSERT_FILE_SQL = """
+    INSERT OR REPLACE INTO files 
+    (filename, extension, folder_id, size_bytes, ctime, mtime, scan_time, is_dir)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# 热点查询语句（模块级常量保证 SQL 文本一致，命中连接的预编译语句缓存）
+_SQL_FOLDER_ID_NOCASE = "SELECT id FROM folders WHERE path = ? COLLATE NOCASE"
+_SQL_FILE_COUNT_IN_FOLDER = """
+    SELECT COUNT(*) FROM files f
+    JOIN folders fo ON f.folder_id = fo.id
+    WHERE fo.path = ? AND (f.is_dir IS NULL OR f.is_dir = 0)
+"""
+_SQL_ERROR_COUNT = "SELECT COUNT(*) FROM scan_errors WHERE resolved = 0"
+
+# 每个连接缓存的预编译语句数（默认 128，搜索语句按形态会占用多个槽位）
+_STATEMENT_CACHE_SIZE = 256
+
+# 轻量优化时每次增量回收的最大页数（8 KiB 页约 80 MB）
+_INCREMENTAL_VACUUM_PAGES = 10000
+
+# batch_insert 单次 executemany 的最大行数
+_INSERT_CHUNK_SIZE = 10000
+
+# 文件夹ID缓存的最大条目数（LRU 淘汰）
+_FOLDER_CACHE_MAX = 50000
+
+# get_folder_contents 结果缓存的最大条目数（LRU 淘汰）
+_CONTENTS_CACHE_MAX = 256
+
+# 路径分隔符统一表（'/' -> '\\'），str.translate 单次遍历完成替换
+_SLASH_TBL = str.maketrans('/', '\\')
+
+# 数据库结构版本（PRAGMA user_version），folders 表列迁移完成后写入
+_SCHEMA_VERSION = 2
+
+
+def _file_row_to_dict(row) -> dict:
+    """将文件查询结果转为字典，并在 Python 侧拼接 full_path（SQL 中不再逐行拼接）"""
+    item = dict(row)
+    parent_folder = item.get('parent_folder')
+    item['full_path'] = parent_folder + '\\' + item['filename'] if parent_folder is not None else None
+    return item
+
+
+def _prefix_range(prefix: str) -> tuple[str, str]:
+    """前缀匹配的区间上下界：path >= lo AND path < hi 等价于 path 以 prefix 开头
+    
+    上界为前缀最后一个字符加一（如 '\\' -> ']'），可直接在路径索引上做范围扫描，
+    且路径中的 '%'、'_' 不会被当作通配符。
+    """
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+class _Connection(sqlite3.Connection):
+    """可被弱引用的连接（sqlite3.Connection 本身不支持弱引用）"""
+
+
+class _ThreadToken:
+    """存放在线程局部数据中的哨兵：线程结束时随之释放，触发关闭该线程的连接"""
+    __slots__ = ('__weakref__',)
+
+
 class DatabaseManager:
     """SQLite 数据库管理器"""
     
@@ -26,38 +93,164 @@ class DatabaseManager:
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # 每个线程持有一个长连接（扫描/监控/界面线程各自复用）
+        self._local = threading.local()
+        # 各线程创建的连接（供 clear_pool 统一关闭），代数变化后各线程重新建连。
+        # 只持有弱引用：线程结束后其线程局部连接随之释放并关闭，不会在此累积
+        self._connections: weakref.WeakSet[_Connection] = weakref.WeakSet()
+        self._pool_lock = threading.Lock()
+        self._pool_generation = 0
+        self._maintenance_executor: Optional[ThreadPoolExecutor] = None  # 后台维护线程（按需创建）
+        self._db_pragmas_applied = False  # page_size/auto_vacuum/journal_mode 是否已写入数据库
+        # 数据变更计数：任一连接提交了写入即递增，用于判定查询结果缓存是否过期
+        self._mutation_counter = 0
+        self._mutation_lock = threading.Lock()
+        # get_folder_contents 结果缓存：(路径, limit, offset) -> (变更计数, 结果)
+        self._contents_cache: OrderedDict[tuple, tuple[int, dict]] = OrderedDict()
+        self._contents_cache_lock = threading.Lock()
+        # 文件夹路径 -> ID 缓存（跨线程共享，需加锁）
+        self._folder_id_cache: OrderedDict[str, int] = OrderedDict()
+        self._folder_cache_lock = threading.Lock()
+        self._fts_enabled = False  # 文件名全文索引是否可用（需 SQLite FTS5 trigram）
+        self._search_sql_cache: dict[tuple, str] = {}  # 搜索语句文本缓存
         self._init_tables()
     
-    @contextmanager
-    def _get_connection(self):
-        """获取数据库连接的上下文管理器"""
-        conn = sqlite3.connect(str(self.db_path))
+    def _create_connection(self) -> sqlite3.Connection:
+        """创建新连接并应用性能设置（每个线程只执行一次）"""
+        # isolation_level=None: 由 _get_connection 显式管理事务
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None,
+                               cached_statements=_STATEMENT_CACHE_SIZE, factory=_Connection)
         conn.row_factory = sqlite3.Row  # 支持按列名访问
         
-        # 性能优化设置
-        conn.execute("PRAGMA journal_mode=WAL")  # WAL模式提升并发性能
+        # 数据库级设置持久保存在文件中，只需第一个连接执行一次
+        if not self._db_pragmas_applied:
+            # 以下两项必须在切换 WAL 及创建表之前设置才能对新数据库生效，对已有数据库无影响
+            conn.execute("PRAGMA page_size = 8192")  # 更大的页减少 B 树层数
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")  # 启用自动回收空间（增量模式）
+            conn.execute("PRAGMA journal_mode=WAL")  # WAL模式提升并发性能
+            self._db_pragmas_applied = True
+        
+        # 连接级性能设置（每个连接都需要）
         conn.execute("PRAGMA synchronous=NORMAL")  # 平衡安全与性能
         conn.execute("PRAGMA cache_size=-64000")  # 64MB缓存
         conn.execute("PRAGMA temp_store=MEMORY")  # 临时表存内存
+        conn.execute("PRAGMA mmap_size=1073741824")  # 1GB 内存映射读取，减少 read() 系统调用
+        return conn
+    
+    def _get_thread_connection(self) -> sqlite3.Connection:
+        """获取当前线程的长连接（不存在时创建）"""
+        local = self._local
+        conn = getattr(local, 'conn', None)
+        if conn is None or local.generation != self._pool_generation:
+            conn = self._create_connection()
+            with self._pool_lock:
+                self._connections.add(conn)
+                local.generation = self._pool_generation
+            local.conn = conn
+            local.depth = 0
+            # 线程结束时立即关闭其连接（连接与语句缓存之间存在引用环，不能等待垃圾回收），
+            # 避免短生命周期线程遗留连接及数据库文件句柄
+            local.token = _ThreadToken()
+            weakref.finalize(local.token, conn.close)
+        return conn
+    
+    def clear_pool(self) -> None:
+        """关闭所有线程的长连接（程序退出时调用；之后再访问数据库会自动重新建连）"""
+        # 先等待后台维护任务结束，避免其连接在执行中被关闭
+        with self._pool_lock:
+            executor, self._maintenance_executor = self._maintenance_executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        
+        with self._pool_lock:
+            connections, self._connections = list(self._connections), weakref.WeakSet()
+            self._pool_generation += 1
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"关闭数据库连接失败: {e}")
+    
+    @contextmanager
+    def _get_connection(self, immediate: bool = True):
+        """获取数据库连接的上下文管理器（复用线程长连接，退出时提交或回滚）
+        
+        支持嵌套使用：只有最外层负责 BEGIN/COMMIT，内层共享同一事务。
         
+        Args:
+            immediate: 使用 BEGIN IMMEDIATE 在事务开始时获取写锁（默认）。
+                延迟事务先读后写时，若其间有其他连接提交，升级写锁会直接
+                失败（SQLITE_BUSY_SNAPSHOT）且不经 busy_timeout 重试；
+                只有确定只读的块才传 False
+        """
+        conn = self._get_thread_connection()
+        local = self._local
+        if local.depth == 0:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            local.changes_at_begin = conn.total_changes
+        local.depth += 1
         try:
             yield conn
-            conn.commit()
-        except Exception:
-            conn.rollback()
+        except BaseException:
+            local.depth -= 1
+            if local.depth == 0:
+                if conn.in_transaction:
+                    conn.rollback()
+                # 回滚后缓存中可能有未提交的文件夹ID
+                self._invalidate_folder_cache()
+                self._bump_mutation_counter()
             raise
+        else:
+            local.depth -= 1
+            if local.depth == 0:
+                if conn.in_transaction:
+                    try:
+                        conn.commit()
+                    except BaseException:
+                        # 提交失败时连接仍处于事务中，不回滚则后续 BEGIN 全部失败
+                        if conn.in_transaction:
+                            conn.rollback()
+                        self._invalidate_folder_cache()
+                        self._bump_mutation_counter()
+                        raise
+                # 本事务写入过数据（含外部模块直接执行的 SQL）时使结果缓存失效
+                if conn.total_changes != local.changes_at_begin:
+                    self._bump_mutation_counter()
+    
+    @contextmanager
+    def _read_connection(self):
+        """获取独立只读连接的上下文管理器（用于导出等长时间逐行读取）
+        
+        不复用线程长连接、不参与 _get_connection 的嵌套计数：读取期间处理界面事件
+        （QApplication.processEvents）时触发的其他数据库操作使用各自的事务，
+        不会并入此读快照，也不会因读取中途出错而被回滚。退出时结束读事务并关闭连接。
+        """
+        conn = self._create_connection()
+        with self._pool_lock:
+            self._connections.add(conn)
+        try:
+            conn.execute("BEGIN")
+            yield conn
         finally:
-            conn.close()
+            with self._pool_lock:
+                self._connections.discard(conn)
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"关闭只读连接失败: {e}")
+    
+    def _bump_mutation_counter(self) -> None:
+        """递增数据变更计数（使所有查询结果缓存失效）"""
+        with self._mutation_lock:
+            self._mutation_counter += 1
     
     def _init_tables(self) -> None:
         """初始化数据库表结构"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
             
-            # 启用自动回收空间（增量模式）
-            # 注意：auto_vacuum需要在创建表之前设置才能生效
-            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
-            
             # 文件夹表（路径去重，节省30-50%空间）
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS folders (
@@ -71,23 +264,30 @@ class DatabaseManager:
                 )
             """)
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_folder_path ON folders(path)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_folder_parent ON folders(parent_id)")
-            
-            # 为旧数据库添加新列（如果不存在）
-            try:
-                cursor.execute("ALTER TABLE folders ADD COLUMN ai_category TEXT")
-            except sqlite3.OperationalError:
-                pass  # 列已存在
-            try:
-                cursor.execute("ALTER TABLE folders ADD COLUMN ai_tags TEXT")
-            except sqlite3.OperationalError:
-                pass  # 列已存在
-            try:
-                cursor.execute("ALTER TABLE folders ADD COLUMN parent_id INTEGER")
-            except sqlite3.OperationalError:
-                pass  # 列已存在
+            # 大小写不敏感的路径索引（供 path = ? COLLATE NOCASE 及前缀范围查询使用）
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_folder_path_nocase ON folders(path COLLATE NOCASE)")
+            
+            # 为旧数据库添加新列（按 user_version 判断，迁移过一次后不再尝试）
+            if cursor.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+                existing = {row['name'] for row in cursor.execute("PRAGMA table_info(folders)")}
+                for column, col_type in (("ai_category", "TEXT"), ("ai_tags", "TEXT"), ("parent_id", "INTEGER")):
+                    if column not in existing:
+                        cursor.execute(f"ALTER TABLE folders ADD COLUMN {column} {col_type}")
+                cursor.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
             # 确保 parent_id 索引存在
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_folder_parent ON folders(parent_id)")
+            
+            # 文件夹闭包表（每个文件夹与其所有祖先的对应关系，含自身 depth=0）
+            # 用于按子树查询，避免 path LIKE 'prefix\%' 扫描
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS folder_closure (
+                    ancestor INTEGER NOT NULL,
+                    descendant INTEGER NOT NULL,
+                    depth INTEGER NOT NULL,
+                    PRIMARY KEY (ancestor, descendant)
+                ) WITHOUT ROWID
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_closure_descendant ON folder_closure(descendant)")
 
             
             # 文件索引表（优化版：用folder_id替代重复的路径文本）
@@ -111,10 +311,13 @@ class DatabaseManager:
             # 创建索引以加速查询
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_filename ON files(filename)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_extension ON files(extension)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_folder_id ON files(folder_id)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_category ON files(ai_category)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_is_dir ON files(is_dir)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_folder_isdir ON files(folder_id, is_dir)")
+            # 目录内容查询（folder_id + is_dir 过滤，按 filename 排序）的复合索引
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_files_folder_isdir_name ON files(folder_id, is_dir, filename)")
+            
+            # 文件名全文索引（trigram 分词，支持 LIKE '%kw%' 子串查询走索引）
+            self._fts_enabled = self._init_filename_fts(cursor)
             
             # 扫描源记录表
             cursor.execute("""
@@ -139,7 +342,22 @@ class DatabaseManager:
                 )
             """)
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_error_path ON scan_errors(file_path)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_error_source ON scan_errors(scan_source)")
+            # 按扫描源列出未解决错误（按时间倒序）的复合索引
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_errors_src_resolved_time
+                ON scan_errors(scan_source, resolved, error_time DESC)
+            """)
+            
+            # 旧版单列/双列索引是上面复合索引的前缀，属于冗余索引；旧库删除后重新统计
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND name IN (?, ?, ?)",
+                ("idx_folder_id", "idx_folder_isdir", "idx_error_source")
+            )
+            redundant = [row[0] for row in cursor.fetchall()]
+            for name in redundant:
+                cursor.execute(f"DROP INDEX {name}")
+            if redundant:
+                cursor.execute("ANALYZE")
             
             # 监控目录表
             cursor.execute("""
@@ -162,12 +380,187 @@ class DatabaseManager:
                     value TEXT
                 )
             """)
+            
+            # 旧数据库升级：闭包表为空但已有文件夹时重建
+            cursor.execute("SELECT EXISTS(SELECT 1 FROM folders) AND NOT EXISTS(SELECT 1 FROM folder_closure)")
+            if cursor.fetchone()[0]:
+                self._rebuild_folder_closure(cursor)
+    
+    def _init_filename_fts(self, cursor) -> bool:
+        """创建文件名 FTS5 索引及同步触发器
+        
+        Returns:
+            是否可用（SQLite 未编译 FTS5 或版本低于 3.34 时返回 False，搜索回退为 LIKE 扫描）
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'files_fts'")
+        exists = cursor.fetchone() is not None
+        try:
+            cursor.execute("SAVEPOINT init_fts")
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
+                    filename, content='files', content_rowid='id', tokenize='trigram'
+                )
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS files_fts_ai AFTER INSERT ON files BEGIN
+                    INSERT INTO files_fts(rowid, filename) VALUES (new.id, new.filename);
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS files_fts_ad AFTER DELETE ON files BEGIN
+                    INSERT INTO files_fts(files_fts, rowid, filename) VALUES ('delete', old.id, old.filename);
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS files_fts_au AFTER UPDATE OF filename ON files BEGIN
+                    INSERT INTO files_fts(files_fts, rowid, filename) VALUES ('delete', old.id, old.filename);
+                    INSERT INTO files_fts(rowid, filename) VALUES (new.id, new.filename);
+                END
+            """)
+            if not exists:
+                # 旧数据库首次创建索引时，从 files 表重建
+                cursor.execute("INSERT INTO files_fts(files_fts) VALUES ('rebuild')")
+            cursor.execute("RELEASE init_fts")
+            return True
+        except sqlite3.OperationalError as e:
+            cursor.execute("ROLLBACK TO init_fts")
+            cursor.execute("RELEASE init_fts")
+            logger.warning(f"文件名全文索引不可用，搜索将使用 LIKE 扫描: {e}")
+            return False
+    
+    def _rebuild_folder_closure(self, cursor) -> None:
+        """重建文件夹闭包表（补全旧数据缺失的 parent_id 后按 parent_id 链生成）"""
+        logger.info("正在重建文件夹层级索引...")
+        # 旧版本创建的文件夹可能没有 parent_id，先补全上级目录及 parent_id
+        cursor.execute("SELECT path FROM folders WHERE parent_id IS NULL")
+        orphan_paths = [row[0] for row in cursor.fetchall() if row[0] and '\\' in row[0]]
+        if orphan_paths:
+            self._resolve_folder_ids(cursor, orphan_paths)
+        
+        cursor.execute("DELETE FROM folder_closure")
+        cursor.execute("""
+            WITH RECURSIVE chain(descendant, ancestor, depth) AS (
+                SELECT id, id, 0 FROM folders
+                UNION ALL
+                SELECT c.descendant, fo.parent_id, c.depth + 1
+                FROM chain c JOIN folders fo ON fo.id = c.ancestor
+                WHERE fo.parent_id IS NOT NULL
+            )
+            INSERT OR IGNORE INTO folder_closure (ancestor, descendant, depth)
+            SELECT ancestor, descendant, depth FROM chain
+        """)
     
     def _frc_standardize_path(self, path: str) -> str:
         """标准化文件路径格式（统一斜杠方向，去除尾部斜杠）"""
         if not path:
             return ""
-        return path.replace('/', '\\').rstrip('\\')
+        return path.translate(_SLASH_TBL).rstrip('\\')
+    
+    def _get_cached_folder_id(self, folder_path: str) -> Optional[int]:
+        """从缓存获取文件夹ID（未命中返回 None）"""
+        with self._folder_cache_lock:
+            folder_id = self._folder_id_cache.get(folder_path)
+            if folder_id is not None:
+                self._folder_id_cache.move_to_end(folder_path)
+            return folder_id
+    
+    def _cache_folder_ids(self, path_to_id: dict[str, int]) -> None:
+        """写入文件夹ID缓存，超出上限时淘汰最久未使用的条目"""
+        cache = self._folder_id_cache
+        with self._folder_cache_lock:
+            for path, folder_id in path_to_id.items():
+                cache[path] = folder_id
+                cache.move_to_end(path)
+            while len(cache) > _FOLDER_CACHE_MAX:
+                cache.popitem(last=False)
+    
+    def _invalidate_folder_cache(self) -> None:
+        """清空文件夹ID缓存（删除文件夹记录或事务回滚后调用）"""
+        with self._folder_cache_lock:
+            self._folder_id_cache.clear()
+    
+    def _folder_with_ancestors(self, folder_path: str) -> list[tuple[str, str]]:
+        """返回路径自身及所有上级目录的 (path, parent_path) 列表，顶级目录的 parent 为 None"""
+        result = []
+        path = folder_path
+        while path:
+            parent, sep, _ = path.rpartition('\\')
+            parent = parent.rstrip('\\') if sep else ''
+            result.append((path, parent or None))
+            path = parent
+        return result
+    
+    def _resolve_folder_ids(self, cursor, folder_paths, scan_source_id: int = None) -> dict[str, int]:
+        """批量获取或创建文件夹ID（含所有上级目录），自动填充 parent_id
+        
+        先在 Python 中汇总去重所有上级路径，再通过临时表一次性写入 folders，
+        避免逐级递归 SELECT + INSERT。
+        
+        Args:
+            cursor: 数据库游标
+            folder_paths: 已标准化的文件夹路径集合
+            scan_source_id: 扫描源ID（仅用于新建的记录）
+            
+        Returns:
+            {路径: 文件夹ID}，包含所有上级目录
+        """
+        pairs = {}
+        for folder_path in folder_paths:
+            for path, parent in self._folder_with_ancestors(folder_path):
+                if path in pairs:
+                    break  # 该路径及其上级已处理过
+                pairs[path] = parent
+        if not pairs:
+            return {}
+        
+        cursor.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS tmp_folder_paths (
+                path TEXT PRIMARY KEY,
+                parent TEXT
+            )
+        """)
+        cursor.execute("DELETE FROM tmp_folder_paths")
+        cursor.executemany("INSERT INTO tmp_folder_paths (path, parent) VALUES (?, ?)", pairs.items())
+        
+        # 一次性创建缺失的文件夹（按路径长度排序，保证父目录先插入）
+        cursor.execute("""
+            INSERT OR IGNORE INTO folders (path, scan_source_id)
+            SELECT path, ? FROM tmp_folder_paths ORDER BY length(path)
+        """, (scan_source_id,))
+        
+        # 一次性填充缺失的 parent_id（UPDATE ... FROM 以临时表驱动连接，只触及本批路径）
+        cursor.execute("""
+            UPDATE folders SET parent_id = p.id
+            FROM tmp_folder_paths t
+            JOIN folders p ON p.path = t.parent
+            WHERE folders.path = t.path AND folders.parent_id IS NULL
+        """)
+        
+        # 为新建的文件夹写入闭包记录（沿 parent_id 链生成全部祖先）
+        cursor.execute("""
+            WITH RECURSIVE chain(descendant, ancestor, depth) AS (
+                SELECT fo.id, fo.id, 0 FROM folders fo
+                JOIN tmp_folder_paths t ON fo.path = t.path
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM folder_closure fc
+                    WHERE fc.ancestor = fo.id AND fc.descendant = fo.id
+                )
+                UNION ALL
+                SELECT c.descendant, fo.parent_id, c.depth + 1
+                FROM chain c JOIN folders fo ON fo.id = c.ancestor
+                WHERE fo.parent_id IS NOT NULL
+            )
+            INSERT OR IGNORE INTO folder_closure (ancestor, descendant, depth)
+            SELECT ancestor, descendant, depth FROM chain
+        """)
+        
+        cursor.execute("""
+            SELECT fo.path, fo.id FROM folders fo
+            JOIN tmp_folder_paths t ON fo.path = t.path
+        """)
+        path_to_id = {row[0]: row[1] for row in cursor.fetchall()}
+        self._cache_folder_ids(path_to_id)
+        return path_to_id
     
     def _get_or_create_folder_id(self, cursor, folder_path: str, scan_source_id: int = None) -> int:
         """获取或创建文件夹ID（路径去重核心方法，自动填充 parent_id）"""
@@ -175,27 +568,42 @@ class DatabaseManager:
             return None
         
         folder_path = self._frc_standardize_path(folder_path)
+        if not folder_path:
+            return None
+        
+        folder_id = self._get_cached_folder_id(folder_path)
+        if folder_id is not None:
+            return folder_id
+        
+        # 上级目录ID已缓存时，单条 UPSERT ... RETURNING 同时完成“查找或创建”
+        parent_path, sep, _ = folder_path.rpartition('\\')
+        parent_path = parent_path.rstrip('\\') if sep else ''
+        parent_id = self._get_cached_folder_id(parent_path) if parent_path else None
+        if parent_id is not None:
+            cursor.execute("""
+                INSERT INTO folders (path, parent_id, scan_source_id) VALUES (?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET path = excluded.path
+                RETURNING id
+            """, (folder_path, parent_id, scan_source_id))
+            folder_id = cursor.fetchone()[0]
+            # 闭包记录：继承上级目录的全部祖先，外加自身（已存在时忽略）
+            cursor.execute("""
+                INSERT OR IGNORE INTO folder_closure (ancestor, descendant, depth)
+                SELECT ancestor, ?, depth + 1 FROM folder_closure WHERE descendant = ?
+                UNION ALL SELECT ?, ?, 0
+            """, (folder_id, parent_id, folder_id, folder_id))
+            self._cache_folder_ids({folder_path: folder_id})
+            return folder_id
         
         # 先尝试获取已有的
         cursor.execute("SELECT id FROM folders WHERE path = ?", (folder_path,))
         row = cursor.fetchone()
         if row:
+            self._cache_folder_ids({folder_path: row[0]})
             return row[0]
         
-        # 计算父目录路径
-        parent_path = '\\'.join(folder_path.split('\\')[:-1]) if '\\' in folder_path else None
-        parent_id = None
-        
-        if parent_path:
-            # 递归获取或创建父目录（确保层级完整）
-            parent_id = self._get_or_create_folder_id(cursor, parent_path, scan_source_id)
-        
-        # 创建当前目录
-        cursor.execute(
-            "INSERT INTO folders (path, parent_id, scan_source_id) VALUES (?, ?, ?)",
-            (folder_path, parent_id, scan_source_id)
-        )
-        return cursor.lastrowid
+        # 不存在时连同缺失的上级目录一起批量创建
+        return self._resolve_folder_ids(cursor, [folder_path], scan_source_id).get(folder_path)
 
     
     def _get_folder_path(self, cursor, folder_id: int) -> str:
@@ -223,11 +631,7 @@ class DatabaseManager:
             parent_folder = file_info.get('parent_folder', '')
             folder_id = self._get_or_create_folder_id(cursor, parent_folder)
             
-            cursor.execute("""
-                INSERT OR REPLACE INTO files 
-                (filename, extension, folder_id, size_bytes, ctime, mtime, scan_time, is_dir)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+            cursor.execute(_INSERT_FILE_SQL, (
                 file_info.get('filename'),
                 file_info.get('extension'),
                 folder_id,
@@ -312,37 +716,45 @@ class DatabaseManager:
         with self._get_connection() as conn:
             cursor = conn.cursor()
             
-            # 先批量创建/获取所有需要的文件夹ID
-            folder_ids = {}  # path -> id 缓存
+            # 先批量创建/获取所有需要的文件夹ID（含上级目录，一次性解析）
+            parent_to_path = {}  # 原始 parent_folder -> 标准化路径
             for f in files:
                 parent_folder = f.get('parent_folder', '')
-                if parent_folder and parent_folder not in folder_ids:
-                    folder_ids[parent_folder] = self._get_or_create_folder_id(cursor, parent_folder)
-            
-            # 批量插入文件
-            records = []
-            for f in files:
-                filename = f.get('filename')
-                if not filename:  # 跳过空文件名
-                    continue
-                parent_folder = f.get('parent_folder', '')
-                folder_id = folder_ids.get(parent_folder)
-                records.append((
-                    filename,
-                    f.get('extension'),
-                    folder_id,
-                    f.get('size_bytes'),
-                    f.get('ctime'),
-                    f.get('mtime'),
-                    f.get('scan_time'),
-                    1 if f.get('is_dir') else 0
+                if parent_folder and parent_folder not in parent_to_path:
+                    parent_to_path[parent_folder] = self._frc_standardize_path(parent_folder)
+            # 缓存命中的直接使用，仅对未命中的路径查询/创建
+            path_to_id = {}
+            missing = set()
+            for path in parent_to_path.values():
+                folder_id = self._get_cached_folder_id(path)
+                if folder_id is None:
+                    missing.add(path)
+                else:
+                    path_to_id[path] = folder_id
+            if missing:
+                path_to_id.update(self._resolve_folder_ids(cursor, missing))
+            folder_ids = {parent: path_to_id.get(path) for parent, path in parent_to_path.items()}
+            
+            # 批量插入文件（同一事务内按块 executemany，限制单次内存占用）
+            for start in range(0, len(files), _INSERT_CHUNK_SIZE):
+                # 按列收集（SoA），最后 zip 成行交给 executemany
+                filenames, extensions, fids, sizes = [], [], [], []
+                ctimes, mtimes, scan_times, is_dirs = [], [], [], []
+                for f in files[start:start + _INSERT_CHUNK_SIZE]:
+                    filename = f.get('filename')
+                    if not filename:  # 跳过空文件名
+                        continue
+                    filenames.append(filename)
+                    extensions.append(f.get('extension'))
+                    fids.append(folder_ids.get(f.get('parent_folder', '')))
+                    sizes.append(f.get('size_bytes'))
+                    ctimes.append(f.get('ctime'))
+                    mtimes.append(f.get('mtime'))
+                    scan_times.append(f.get('scan_time'))
+                    is_dirs.append(1 if f.get('is_dir') else 0)
+                cursor.executemany(_INSERT_FILE_SQL, zip(
+                    filenames, extensions, fids, sizes, ctimes, mtimes, scan_times, is_dirs
                 ))
-            
-            cursor.executemany("""
-                INSERT OR REPLACE INTO files 
-                (filename, extension, folder_id, size_bytes, ctime, mtime, scan_time, is_dir)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, records)
             return len(files)
     
     def search_files(self, keyword: str, extension: str = None, limit: int = 1000) -> list[dict]:
@@ -357,7 +769,7 @@ class DatabaseManager:
         Returns:
             匹配的文件列表
         """
-        with self._get_connection() as conn:
+        with self._get_connection(immediate=False) as conn:
             cursor = conn.cursor()
             
             # 分割关键词（支持多个空格分隔的关键词）
@@ -366,57 +778,83 @@ class DatabaseManager:
             if not keywords:
                 return []
             
-            # 构建多关键词 AND 查询（使用JOIN）
-            conditions = []
-            params = []
-            
-            for kw in keywords:
-                conditions.append("f.filename LIKE ?")
-                params.append(f"%{kw}%")
-            
-            query = """
-                SELECT f.*, fo.path as parent_folder, 
-                       fo.path || '\\' || f.filename as full_path
-                FROM files f
-                LEFT JOIN folders fo ON f.folder_id = fo.id
-                WHERE """ + " AND ".join(conditions)
-            
+            # 不少于 3 个字符的关键词走 trigram 全文索引，较短的关键词只能逐行 LIKE 匹配
+            fts_flags = tuple(self._fts_enabled and len(kw) >= 3 for kw in keywords)
+            params = [f"%{kw}%" for kw in keywords]
             if extension:
-                query += " AND f.extension = ?"
                 params.append(extension.lower().lstrip('.'))
+            params.append(limit)
             
-            query += f" ORDER BY f.filename LIMIT {limit}"
-            
+            query = self._build_search_sql(fts_flags, bool(extension))
             cursor.execute(query, params)
-            return [dict(row) for row in cursor.fetchall()]
+            return [_file_row_to_dict(row) for row in cursor]
+    
+    def _build_search_sql(self, fts_flags: tuple, with_extension: bool) -> str:
+        """构建搜索 SQL（按关键词形态缓存，相同形态复用同一语句文本以命中语句缓存）
+        
+        Args:
+            fts_flags: 每个关键词是否走全文索引
+            with_extension: 是否按扩展名过滤
+        """
+        key = (fts_flags, with_extension)
+        query = self._search_sql_cache.get(key)
+        if query is not None:
+            return query
+        
+        # 构建多关键词 AND 查询（使用JOIN）
+        conditions = [
+            "files_fts.filename LIKE ?" if use_fts else "f.filename LIKE ?"
+            for use_fts in fts_flags
+        ]
+        if with_extension:
+            conditions.append("f.extension = ?")
+        
+        if any(fts_flags):
+            source = """
+                FROM files_fts
+                JOIN files f ON f.id = files_fts.rowid
+                LEFT JOIN folders fo ON f.folder_id = fo.id"""
+        else:
+            source = """
+                FROM files f
+                LEFT JOIN folders fo ON f.folder_id = fo.id"""
+        
+        query = ("SELECT f.*, fo.path as parent_folder" + source
+                 + " WHERE " + " AND ".join(conditions)
+                 + " ORDER BY f.filename LIMIT ?")
+        if len(self._search_sql_cache) >= 64:
+            self._search_sql_cache.clear()  # 形态组合有限，超出时简单清空
+        self._search_sql_cache[key] = query
+        return query
     
     def get_files_by_extension(self, extension: str, limit: int = 10000) -> list[dict]:
         """获取指定扩展名的所有文件"""
         ext = extension.lower().lstrip('.')
-        with self._get_connection() as conn:
+        with self._get_connection(immediate=False) as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT f.*, fo.path as parent_folder,
-                       fo.path || '\\' || f.filename as full_path
+                SELECT f.*, fo.path as parent_folder
                 FROM files f
                 LEFT JOIN folders fo ON f.folder_id = fo.id
                 WHERE f.extension = ? LIMIT ?
             """, (ext, limit))
-            return [dict(row) for row in cursor.fetchall()]
+            return [_file_row_to_dict(row) for row in cursor]
     
     def get_files_by_folder(self, folder_path: str) -> list[dict]:
         """获取指定目录下的所有文件"""
-        folder_path = folder_path.replace('/', '\\').rstrip('\\')
-        with self._get_connection() as conn:
+        folder_path = folder_path.translate(_SLASH_TBL).rstrip('\\')
+        with self._get_connection(immediate=False) as conn:
             cursor = conn.cursor()
+            # 通过闭包表取整棵子树的文件夹，纯索引查找
             cursor.execute("""
-                SELECT f.*, fo.path as parent_folder,
-                       fo.path || '\\' || f.filename as full_path
-                FROM files f
-                LEFT JOIN folders fo ON f.folder_id = fo.id
-                WHERE fo.path = ? OR fo.path LIKE ?
-            """, (folder_path, f"{folder_path}\\%"))
-            return [dict(row) for row in cursor.fetchall()]
+                SELECT f.*, fo.path as parent_folder
+                FROM folders root
+                JOIN folder_closure fc ON fc.ancestor = root.id
+                JOIN files f ON f.folder_id = fc.descendant
+                JOIN folders fo ON fo.id = fc.descendant
+                WHERE root.path = ?
+            """, (folder_path,))
+            return [_file_row_to_dict(row) for row in cursor]
     
     def update_ai_tags(self, file_id: int, category: str = None, tags: str = None) -> None:
         """更新文件的AI分类和标签"""
@@ -454,8 +892,9 @@ class DatabaseManager:
             return 0
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            placeholders = ','.join('?' * len(file_ids))
-            cursor.execute(f"DELETE FROM files WHERE id IN ({placeholders})", file_ids)
+            # ID 列表以 JSON 数组绑定，语句文本固定（可复用预编译语句，且不受变量个数上限限制）
+            cursor.execute("DELETE FROM files WHERE id IN (SELECT value FROM json_each(?))",
+                           (json.dumps(list(file_ids)),))
             return cursor.rowcount
     
     def delete_dir_record(self, dir_path: str) -> bool:
@@ -467,14 +906,14 @@ class DatabaseManager:
         Returns:
             是否删除成功
         """
-        dir_path = dir_path.replace('/', '\\').rstrip('\\')
-        dir_name = dir_path.split('\\')[-1] if '\\' in dir_path else dir_path
-        parent_path = '\\'.join(dir_path.split('\\')[:-1]) if '\\' in dir_path else ''
+        dir_path = dir_path.translate(_SLASH_TBL).rstrip('\\')
+        # rpartition 一次扫描拆出上级路径和目录名（无分隔符时上级为空串）
+        parent_path, _, dir_name = dir_path.rpartition('\\')
         
         with self._get_connection() as conn:
             cursor = conn.cursor()
             # 获取父目录 folder_id
-            cursor.execute("SELECT id FROM folders WHERE path = ? COLLATE NOCASE", (parent_path,))
+            cursor.execute(_SQL_FOLDER_ID_NOCASE, (parent_path,))
             row = cursor.fetchone()
             if row:
                 cursor.execute(
@@ -525,7 +964,7 @@ class DatabaseManager:
                 return True
             
             # 尝试用文件夹名末尾模糊匹配
-            folder_name = normalized_path.split('\\')[-1] if '\\' in normalized_path else normalized_path
+            folder_name = normalized_path.rpartition('\\')[2]
             cursor.execute("""
                 UPDATE folders SET ai_category = ?, ai_tags = ? 
                 WHERE path COLLATE NOCASE LIKE ?
@@ -534,11 +973,13 @@ class DatabaseManager:
             if cursor.rowcount > 0:
                 return True
             
-            # 文件夹不存在，创建它
+            # 文件夹不存在，创建它（连同上级目录及层级关系）
             try:
-                cursor.execute("""
-                    INSERT INTO folders (path, ai_category, ai_tags) VALUES (?, ?, ?)
-                """, (normalized_path, ai_category, ai_tags))
+                folder_id = self._get_or_create_folder_id(cursor, normalized_path)
+                cursor.execute(
+                    "UPDATE folders SET ai_category = ?, ai_tags = ? WHERE id = ?",
+                    (ai_category, ai_tags, folder_id)
+                )
                 return True
             except Exception as e:
                 logger.warning(f"    创建文件夹记录失败: {e}")
@@ -546,8 +987,9 @@ class DatabaseManager:
     
     def get_all_extensions(self) -> list[tuple[str, int]]:
         """获取所有扩展名及其文件数量"""
-        with self._get_connection() as conn:
+        with self._get_connection(immediate=False) as conn:
             cursor = conn.cursor()
+            cursor.row_factory = None  # 两列结果直接返回元组，无需构造 Row 对象
             cursor.execute("""
                 SELECT extension, COUNT(*) as count 
                 FROM files 
@@ -555,14 +997,14 @@ class DatabaseManager:
                 GROUP BY extension 
                 ORDER BY count DESC
             """)
-            return [(row['extension'], row['count']) for row in cursor.fetchall()]
+            return cursor.fetchall()
     
     def get_folder_tree(self) -> list[str]:
         """获取所有扫描源目录列表（用于构建目录树）
         
         排序规则：本地路径在前，网络路径在后，各自按字母顺序
         """
-        with self._get_connection() as conn:
+        with self._get_connection(immediate=False) as conn:
             cursor = conn.cursor()
             # 从scan_sources表获取扫描源
             cursor.execute("SELECT path FROM scan_sources")
@@ -585,25 +1027,24 @@ class DatabaseManager:
         """从路径列表中提取扫描源（顶级目录）"""
         sources = set()
         for path in paths:
-            path = path.replace('/', '\\')
+            path = path.translate(_SLASH_TBL)
             if path.startswith('\\\\'):
                 # 网络路径：取 \\server\share
-                parts = path.lstrip('\\').split('\\')
-                if len(parts) >= 2:
-                    sources.add('\\\\' + parts[0] + '\\' + parts[1])
+                server, sep, rest = path.lstrip('\\').partition('\\')
+                if sep:
+                    sources.add('\\\\' + server + '\\' + rest.partition('\\')[0])
             else:
                 # 本地路径：取盘符
-                parts = path.split('\\')
-                if parts:
-                    sources.add(parts[0] + '\\')
+                sources.add(path.partition('\\')[0] + '\\')
         return list(sources)
     
     def get_all_directories(self) -> list[str]:
         """获取所有目录路径（用于构建完整目录树）"""
-        with self._get_connection() as conn:
+        with self._get_connection(immediate=False) as conn:
             cursor = conn.cursor()
+            cursor.row_factory = None  # 单列结果按下标读取，无需构造 Row 对象
             cursor.execute("SELECT path FROM folders ORDER BY path")
-            return [row['path'] for row in cursor.fetchall() if row['path']]
+            return [row[0] for row in cursor if row[0]]
     
     def get_direct_subdirs(self, parent_path: str) -> list[dict]:
         """获取指定路径下的直接子目录（优先使用 parent_id 索引查询）
@@ -614,38 +1055,32 @@ class DatabaseManager:
         Returns:
             子目录列表，每项包含 name, path, has_children
         """
-        parent_path = parent_path.replace('/', '\\').rstrip('\\')
+        parent_path = parent_path.translate(_SLASH_TBL).rstrip('\\')
         
-        with self._get_connection() as conn:
+        with self._get_connection(immediate=False) as conn:
             cursor = conn.cursor()
             
             # 获取父目录的 ID
-            cursor.execute("SELECT id FROM folders WHERE path = ? COLLATE NOCASE", (parent_path,))
+            cursor.execute(_SQL_FOLDER_ID_NOCASE, (parent_path,))
             parent_row = cursor.fetchone()
             
             if parent_row:
                 parent_id = parent_row['id']
                 
-                # 使用 parent_id 索引查询直接子目录（O(1) 复杂度）
+                # 使用 parent_id 索引查询直接子目录，并在同一查询中判断是否有子目录
+                # （避免逐个子目录再发起查询）
                 cursor.execute("""
-                    SELECT id, path, ai_category, ai_tags
-                    FROM folders 
-                    WHERE parent_id = ?
+                    SELECT c.path,
+                           EXISTS(SELECT 1 FROM folders gc WHERE gc.parent_id = c.id) AS has_subdirs
+                    FROM folders c
+                    WHERE c.parent_id = ?
                 """, (parent_id,))
                 
                 subdirs = []
                 for row in cursor.fetchall():
-                    folder_id = row['id']
                     path = row['path']
-                    name = path.split('\\')[-1] if '\\' in path else path
-                    
-                    # 检查是否有子目录（使用 parent_id 索引）
-                    cursor.execute("SELECT 1 FROM folders WHERE parent_id = ? LIMIT 1", (folder_id,))
-                    has_subdirs = cursor.fetchone() is not None
-                    
-                    # 检查是否有文件
-                    cursor.execute("SELECT 1 FROM files WHERE folder_id = ? LIMIT 1", (folder_id,))
-                    has_files = cursor.fetchone() is not None
+                    name = path.rpartition('\\')[2]
+                    has_subdirs = bool(row['has_subdirs'])
                     
                     subdirs.append({
                         'name': name,
@@ -655,19 +1090,20 @@ class DatabaseManager:
                 
                 return sorted(subdirs, key=lambda x: x['name'].lower())
             
-            # 回退方案：parent_id 未填充时使用 LIKE 查询
+            # 回退方案：parent_id 未填充时按路径前缀范围查询
             prefix = parent_path + '\\'
             prefix_len = len(prefix)
+            lo, hi = _prefix_range(prefix)
             
             cursor.execute("""
                 SELECT DISTINCT 
                     SUBSTR(path, ?) as remaining,
                     path
                 FROM folders 
-                WHERE path LIKE ? ESCAPE '\\'
+                WHERE path >= ? COLLATE NOCASE AND path < ? COLLATE NOCASE
                   AND path COLLATE NOCASE != ?
                   AND INSTR(SUBSTR(path, ?), '\\') = 0
-            """, (prefix_len + 1, prefix.replace('\\', '\\\\') + '%', parent_path, prefix_len + 1))
+            """, (prefix_len + 1, lo, hi, parent_path, prefix_len + 1))
             
             subdirs_by_name = {}
             for row in cursor.fetchall():
@@ -677,29 +1113,20 @@ class DatabaseManager:
                     if name_key not in subdirs_by_name:
                         subdirs_by_name[name_key] = {
                             'name': name,
-                            'path': parent_path + '\\' + name,
+                            'path': prefix + name,
                         }
             
             result = []
             for subdir in subdirs_by_name.values():
                 subdir_path = subdir['path']
-                subdir_prefix = subdir_path + '\\'
                 
                 cursor.execute("""
                     SELECT 1 FROM folders 
-                    WHERE path LIKE ? ESCAPE '\\' 
+                    WHERE path >= ? COLLATE NOCASE AND path < ? COLLATE NOCASE
                     LIMIT 1
-                """, (subdir_prefix.replace('\\', '\\\\') + '%',))
+                """, _prefix_range(subdir_path + '\\'))
                 has_subdirs = cursor.fetchone() is not None
                 
-                cursor.execute("""
-                    SELECT 1 FROM files f
-                    JOIN folders fo ON f.folder_id = fo.id
-                    WHERE fo.path COLLATE NOCASE = ?
-                    LIMIT 1
-                """, (subdir_path,))
-                has_files = cursor.fetchone() is not None
-                
                 subdir['has_children'] = has_subdirs  # 只检查是否有子目录
                 result.append(subdir)
             
@@ -709,35 +1136,29 @@ class DatabaseManager:
     
     def get_stats(self) -> dict:
         """获取统计信息"""
-        with self._get_connection() as conn:
+        with self._get_connection(immediate=False) as conn:
             cursor = conn.cursor()
             
-            # 总文件数
-            cursor.execute("SELECT COUNT(*) as count FROM files")
-            total_files = cursor.fetchone()['count']
-            
-            # 总大小
-            cursor.execute("SELECT SUM(size_bytes) as total FROM files")
-            total_size = cursor.fetchone()['total'] or 0
-            
-            # 扩展名数量
-            cursor.execute("SELECT COUNT(DISTINCT extension) as count FROM files")
-            extension_count = cursor.fetchone()['count']
-            
-            # 已AI分类的文件数
-            cursor.execute("SELECT COUNT(*) as count FROM files WHERE ai_category IS NOT NULL")
-            ai_categorized = cursor.fetchone()['count']
+            # 单条聚合查询，一次扫描 files 表得到全部统计
+            cursor.execute("""
+                SELECT COUNT(*) as total_files,
+                       COALESCE(SUM(size_bytes), 0) as total_size,
+                       COUNT(DISTINCT extension) as extension_count,
+                       COUNT(ai_category) as ai_categorized
+                FROM files
+            """)
+            row = cursor.fetchone()
             
             return {
-                'total_files': total_files,
-                'total_size': total_size,
-                'extension_count': extension_count,
-                'ai_categorized': ai_categorized
+                'total_files': row['total_files'],
+                'total_size': row['total_size'],
+                'extension_count': row['extension_count'],
+                'ai_categorized': row['ai_categorized']
             }
     
     def clear_source(self, scan_source: str) -> int:
         """清除指定扫描源的所有记录"""
-        scan_source_normalized = scan_source.replace('/', '\\').rstrip('\\').lower()
+        scan_source_normalized = scan_source.translate(_SLASH_TBL).rstrip('\\').lower()
         
         with self._get_connection() as conn:
             cursor = conn.cursor()
@@ -751,173 +1172,158 @@ class DatabaseManager:
             """, (scan_source_normalized, f"{scan_source_normalized}\\%"))
             deleted_count = cursor.rowcount
             
+            # 删除闭包记录
+            cursor.execute("""
+                DELETE FROM folder_closure WHERE descendant IN (
+                    SELECT id FROM folders 
+                    WHERE LOWER(path) = ? OR LOWER(path) LIKE ?
+                )
+            """, (scan_source_normalized, f"{scan_source_normalized}\\%"))
+            
             # 删除文件夹记录
             cursor.execute("""
                 DELETE FROM folders 
                 WHERE LOWER(path) = ? OR LOWER(path) LIKE ?
             """, (scan_source_normalized, f"{scan_source_normalized}\\%"))
+            # LIKE 的通配规则与前缀匹配不完全一致，直接清空缓存
+            self._invalidate_folder_cache()
         
-        # VACUUM回收空间
+        # 增量回收空闲页（最多 1000 页），避免 VACUUM 重写整个数据库文件
         if deleted_count > 0:
-            conn = sqlite3.connect(str(self.db_path))
-            conn.execute("VACUUM")
-            conn.close()
+            self._incremental_vacuum(1000)
         
         return deleted_count
     
     def get_all_files(self, limit: int = 10000, offset: int = 0) -> list[dict]:
         """获取所有文件（分页）"""
-        with self._get_connection() as conn:
+        with self._get_connection(immediate=False) as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT f.*, fo.path as parent_folder,
-                       fo.path || '\\' || f.filename as full_path
+                SELECT f.*, fo.path as parent_folder
                 FROM files f
                 LEFT JOIN folders fo ON f.folder_id = fo.id
                 ORDER BY f.filename LIMIT ? OFFSET ?
             """, (limit, offset))
-            return [dict(row) for row in cursor.fetchall()]
+            return [_file_row_to_dict(row) for row in cursor]
     
     def get_folder_contents(self, folder_path: str, limit: int = 500, offset: int = 0) -> dict:
-        """获取指定目录的内容（直接子目录和文件）"""
-        folder_path = folder_path.replace('/', '\\').rstrip('\\')
+        """获取指定目录的内容（直接子目录和文件）
+        
+        结果按 (路径, limit, offset) 缓存，数据库有写入提交后自动失效；
+        返回的字典与缓存共享，调用方不应修改。
+        """
+        folder_path = folder_path.translate(_SLASH_TBL).rstrip('\\')
+        key = (folder_path, limit, offset)
+        # 查询前读取变更计数：查询期间若有写入，缓存条目会因计数落后而失效
+        counter = self._mutation_counter
+        with self._contents_cache_lock:
+            cached = self._contents_cache.get(key)
+            if cached is not None and cached[0] == counter:
+                self._contents_cache.move_to_end(key)
+                return cached[1]
+        
+        result = self._query_folder_contents(folder_path, limit, offset)
+        
+        with self._contents_cache_lock:
+            self._contents_cache[key] = (counter, result)
+            self._contents_cache.move_to_end(key)
+            while len(self._contents_cache) > _CONTENTS_CACHE_MAX:
+                self._contents_cache.popitem(last=False)
+        return result
+    
+    def _query_folder_contents(self, folder_path: str, limit: int, offset: int) -> dict:
+        """查询目录内容（get_folder_contents 的实际实现，folder_path 已标准化）"""
         # 注意：SQLite LOWER() 对非 ASCII 字符无效，使用精确匹配
-        prefix = folder_path + '\\'
+        prefix = folder_path + '\\'  # 子目录 full_path 共用的前缀，循环内只做一次拼接
         prefix_len = len(prefix)
+        lo, hi = _prefix_range(prefix)
         
-        with self._get_connection() as conn:
+        with self._get_connection(immediate=False) as conn:
             cursor = conn.cursor()
             
             # 获取当前目录的folder_id（精确匹配，但允许大小写差异）
             # 使用 COLLATE NOCASE 确保 Windows 路径不区分大小写
-            cursor.execute("SELECT id FROM folders WHERE path = ? COLLATE NOCASE", (folder_path,))
+            cursor.execute(_SQL_FOLDER_ID_NOCASE, (folder_path,))
             row = cursor.fetchone()
             current_folder_id = row['id'] if row else None
             
+            # 目录不存在（如过期的书签）：写入时总会同时创建所有上级目录，
+            # 因此也不会有子目录，直接返回空结果
+            if current_folder_id is None:
+                return {'subdirs': [], 'files': [], 'has_more': False, 'total': 0}
+            
             # 获取直接子目录（优化：只查询第一级子目录）
             # 使用 COLLATE NOCASE 进行大小写不敏感比较（对非ASCII字符也有效）
+            # 同一查询中：相关子查询按 folder_id 索引统计各子目录文件数；
+            # UNION ALL 合并 files 表中的目录记录（is_dir=1），
+            # 这些目录可能不在 folders 表中（如只有子目录没有文件的目录），文件数为 0
+            # 结果在 SQL 中按名称（忽略大小写）排序，同名时 folders 记录在前
+            # folders.path 唯一，每个子目录本就只有一行；不能用 DISTINCT，
+            # 否则仅大小写不同且统计列相同的子目录会被合并，文件数少算
             cursor.execute("""
-                SELECT DISTINCT 
+                SELECT
                     SUBSTR(path, ?) as remaining,
-                    path,
                     ai_category,
-                    ai_tags
+                    ai_tags,
+                    (SELECT COUNT(*) FROM files f WHERE f.folder_id = folders.id) as file_count,
+                    0 as from_files
                 FROM folders 
-                WHERE path LIKE ? ESCAPE '\\'
+                WHERE path >= ? COLLATE NOCASE AND path < ? COLLATE NOCASE
                   AND path COLLATE NOCASE != ?
                   AND INSTR(SUBSTR(path, ?), '\\') = 0
-            """, (prefix_len + 1, prefix.replace('\\', '\\\\') + '%', folder_path, prefix_len + 1))
-            
-            # 按文件名（忽略大小写）分组去重
+                UNION ALL
+                SELECT filename, NULL, NULL, 0, 1
+                FROM files
+                WHERE folder_id = ? AND is_dir = 1 AND filename != ''
+                ORDER BY remaining COLLATE NOCASE, from_files
+            """, (prefix_len + 1, lo, hi, folder_path, prefix_len + 1, current_folder_id))
+            
+            # 按文件名（忽略大小写）分组去重：每组第一个作为代表，文件数汇总所有变体
+            # files 表中的目录仅在 folders 中没有同名目录时补充（排序保证其排在同名 folders 记录之后）
             dirs_by_name = {}
-            for row in cursor.fetchall():
-                first_part = row['remaining'].split('\\')[0] if row['remaining'] else ''
-                if first_part:
-                    name_key = first_part.lower()
-                    if name_key not in dirs_by_name:
-                        dirs_by_name[name_key] = []
-                    
-                    dirs_by_name[name_key].append({
+            for row in cursor:
+                first_part = row['remaining']
+                if not first_part:  # 跳过空文件名
+                    continue
+                name_key = first_part.lower()
+                rep = dirs_by_name.get(name_key)
+                if rep is None:
+                    dirs_by_name[name_key] = {
                         'filename': first_part,
-                        'full_path': folder_path + '\\' + first_part,
+                        'full_path': prefix + first_part,
                         'is_dir': 1,
                         'ai_category': row['ai_category'] or '',
                         'ai_tags': row['ai_tags'] or '',
-                    })
-            
-            # 额外查询 files 表中的目录记录（is_dir=1）
-            # 这些目录可能不在 folders 表中（如只有子目录没有文件的目录）
-            if current_folder_id:
-                cursor.execute("""
-                    SELECT f.filename, f.id
-                    FROM files f
-                    WHERE f.folder_id = ? AND f.is_dir = 1 AND f.filename != ''
-                """, (current_folder_id,))
-                
-                for row in cursor.fetchall():
-                    dir_name = row['filename']
-                    if not dir_name:  # 跳过空文件名
-                        continue
-                    name_key = dir_name.lower()
-                    if name_key not in dirs_by_name:
-                        dirs_by_name[name_key] = []
-                        dirs_by_name[name_key].append({
-                            'filename': dir_name,
-                            'full_path': folder_path + '\\' + dir_name,
-                            'is_dir': 1,
-                            'ai_category': '',
-                            'ai_tags': '',
-                        })
-            
-            subdirs_direct = []
-            all_variant_paths = []
-            
-            for variants in dirs_by_name.values():
-                # 选取每一组的第一个作为代表
-                rep = variants[0]
-                # 记录该组所有变体的路径，以便后续汇总统计
-                rep['_all_paths'] = [v['full_path'] for v in variants]
-                all_variant_paths.extend(rep['_all_paths'])
-                subdirs_direct.append(rep)
-            
-            # 为子目录批量获取计数（汇总所有变体）
-            if all_variant_paths:
-                # 批量查询所有变体的 folder_id
-                placeholders = ','.join('?' * len(all_variant_paths))
-                cursor.execute(f"""
-                    SELECT id, path FROM folders 
-                    WHERE path IN ({placeholders})
-                """, all_variant_paths)
-                path_to_id = {row['path']: row['id'] for row in cursor.fetchall()}
-                
-                # 批量查询文件数
-                folder_ids = list(path_to_id.values())
-                if folder_ids:
-                    placeholders = ','.join('?' * len(folder_ids))
-                    cursor.execute(f"""
-                        SELECT folder_id, COUNT(*) as count FROM files 
-                        WHERE folder_id IN ({placeholders})
-                        GROUP BY folder_id
-                    """, folder_ids)
-                    id_to_count = {row['folder_id']: row['count'] for row in cursor.fetchall()}
-                else:
-                    id_to_count = {}
-                
-                # 汇总赋值
-                for subdir in subdirs_direct:
-                    total_count = 0
-                    for path in subdir.get('_all_paths', []):
-                        fid = path_to_id.get(path)
-                        if fid:
-                            total_count += id_to_count.get(fid, 0)
-                    subdir['file_count'] = total_count
-                    # 清理临时字段
-                    if '_all_paths' in subdir:
-                        del subdir['_all_paths']
-            
-            subdirs_direct.sort(key=lambda x: x['filename'].lower())
-            
-            # 获取直接文件
-            if current_folder_id:
+                        'file_count': row['file_count'],
+                    }
+                elif not row['from_files']:
+                    rep['file_count'] += row['file_count']
+            
+            # 字典保持插入顺序，即 SQL 的排序结果
+            subdirs_direct = list(dirs_by_name.values())
+            # 获取直接文件（窗口函数 COUNT(*) OVER () 在分页结果的每行附带总数，省去单独的 COUNT 查询）
+            cursor.execute("""
+                SELECT f.*, fo.path as parent_folder, COUNT(*) OVER () as total_count
+                FROM files f
+                LEFT JOIN folders fo ON f.folder_id = fo.id
+                WHERE f.folder_id = ? AND (f.is_dir = 0 OR f.is_dir IS NULL)
+                ORDER BY f.filename
+                LIMIT ? OFFSET ?
+            """, (current_folder_id, limit, offset))
+            files = [_file_row_to_dict(row) for row in cursor]
+            if files:
+                total_files = files[0]['total_count']
+                for item in files:
+                    del item['total_count']
+            elif offset > 0:
+                # 偏移超出范围时没有返回行，单独统计总数
                 cursor.execute("""
-                    SELECT COUNT(*) as total FROM files 
+                    SELECT COUNT(*) FROM files 
                     WHERE folder_id = ? AND (is_dir = 0 OR is_dir IS NULL)
                 """, (current_folder_id,))
-                total_files = cursor.fetchone()['total']
-                
-                cursor.execute("""
-                    SELECT f.*, fo.path as parent_folder,
-                           fo.path || '\\' || f.filename as full_path
-                    FROM files f
-                    LEFT JOIN folders fo ON f.folder_id = fo.id
-                    WHERE f.folder_id = ? AND (f.is_dir = 0 OR f.is_dir IS NULL)
-                    ORDER BY f.filename
-                    LIMIT ? OFFSET ?
-                """, (current_folder_id, limit, offset))
-                files = [dict(row) for row in cursor.fetchall()]
+                total_files = cursor.fetchone()[0]
             else:
                 total_files = 0
-                files = []
             
             has_more = (offset + len(files)) < total_files
             
@@ -930,31 +1336,37 @@ class DatabaseManager:
     
     def get_file_count_in_folder(self, folder_path: str) -> int:
         """获取指定目录下的直接文件数量"""
-        folder_path = folder_path.replace('/', '\\').rstrip('\\')
-        with self._get_connection() as conn:
+        folder_path = folder_path.translate(_SLASH_TBL).rstrip('\\')
+        with self._get_connection(immediate=False) as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT COUNT(*) FROM files f
-                JOIN folders fo ON f.folder_id = fo.id
-                WHERE fo.path = ? AND (f.is_dir IS NULL OR f.is_dir = 0)
-            """, (folder_path,))
+            cursor.execute(_SQL_FILE_COUNT_IN_FOLDER, (folder_path,))
             return cursor.fetchone()[0]
     
     # ========== 扫描错误管理 ==========
     
     def insert_scan_error(self, file_path: str, error_message: str, scan_source: str):
         """记录扫描错误"""
+        self.insert_scan_errors([(file_path, error_message, scan_source)])
+    
+    def insert_scan_errors(self, items: Iterable[tuple[str, str, str]]) -> None:
+        """批量记录扫描错误（单个事务内 executemany 写入）
+        
+        Args:
+            items: (file_path, error_message, scan_source) 元组序列
+        """
         import time
+        now = time.time()
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
+            cursor.executemany("""
                 INSERT INTO scan_errors (file_path, error_message, error_time, scan_source)
                 VALUES (?, ?, ?, ?)
-            """, (file_path, error_message, time.time(), scan_source))
+            """, [(file_path, error_message, now, scan_source)
+                  for file_path, error_message, scan_source in items])
     
     def get_scan_errors(self, scan_source: str = None, include_resolved: bool = False) -> list[dict]:
-        """获取扫描错误列表"""
-        with self._get_connection() as conn:
+        """获取扫描错误列表（在事务内一次性读取完毕）"""
+        with self._get_connection(immediate=False) as conn:
             cursor = conn.cursor()
             if scan_source:
                 if include_resolved:
@@ -966,26 +1378,50 @@ class DatabaseManager:
                     cursor.execute("SELECT * FROM scan_errors ORDER BY error_time DESC")
                 else:
                     cursor.execute("SELECT * FROM scan_errors WHERE resolved = 0 ORDER BY error_time DESC")
-            return [dict(row) for row in cursor.fetchall()]
+            return [dict(row) for row in cursor]
     
     def get_error_count(self) -> int:
         """获取未解决错误数量"""
-        with self._get_connection() as conn:
+        with self._get_connection(immediate=False) as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) as count FROM scan_errors WHERE resolved = 0")
-            return cursor.fetchone()['count']
+            cursor.execute(_SQL_ERROR_COUNT)
+            return cursor.fetchone()[0]
     
     def mark_error_resolved(self, error_id: int):
         """标记错误为已解决"""
+        self.mark_errors_resolved([error_id])
+    
+    def mark_errors_resolved(self, error_ids: list[int]) -> int:
+        """批量标记错误为已解决（单条语句、单个事务）
+        
+        Returns:
+            更新的记录数
+        """
+        if not error_ids:
+            return 0
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("UPDATE scan_errors SET resolved = 1 WHERE id = ?", (error_id,))
+            cursor.execute("UPDATE scan_errors SET resolved = 1 WHERE id IN (SELECT value FROM json_each(?))",
+                           (json.dumps(list(error_ids)),))
+            return cursor.rowcount
     
     def delete_error(self, error_id: int):
         """删除错误记录"""
+        self.delete_errors([error_id])
+    
+    def delete_errors(self, error_ids: list[int]) -> int:
+        """批量删除错误记录（单条语句、单个事务）
+        
+        Returns:
+            删除的记录数
+        """
+        if not error_ids:
+            return 0
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("DELETE FROM scan_errors WHERE id = ?", (error_id,))
+            cursor.execute("DELETE FROM scan_errors WHERE id IN (SELECT value FROM json_each(?))",
+                           (json.dumps(list(error_ids)),))
+            return cursor.rowcount
     
     def clear_errors(self, scan_source: str = None):
         """清除错误记录"""
@@ -996,9 +1432,13 @@ class DatabaseManager:
             else:
                 cursor.execute("DELETE FROM scan_errors")
     
-    def optimize_database(self) -> dict:
+    def optimize_database(self, light: bool = False) -> dict:
         """优化数据库（压缩和更新统计）
         
+        Args:
+            light: 轻量模式，只增量回收空闲页（不重写整个文件，不阻塞其他连接的读取），
+                   适合例行维护；默认执行完整 VACUUM（用户手动“压缩”时使用）
+        
         Returns:
             优化结果信息
         """
@@ -1007,12 +1447,17 @@ class DatabaseManager:
         # 获取优化前大小
         size_before = os.path.getsize(self.db_path) if self.db_path.exists() else 0
         
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
+        conn = self._get_thread_connection()
+        if light:
+            # 增量回收（需 auto_vacuum=INCREMENTAL，旧数据库上为空操作）
+            self._incremental_vacuum(_INCREMENTAL_VACUUM_PAGES)
+        else:
             # VACUUM 压缩数据库，回收空间
-            cursor.execute("VACUUM")
-            # ANALYZE 更新查询优化器统计信息
-            cursor.execute("ANALYZE")
+            self.compact()
+        # WAL 模式下回收的页在检查点写回主库时才真正截断文件
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        # ANALYZE 更新查询优化器统计信息
+        conn.execute("ANALYZE")
         
         # 获取优化后大小
         size_after = os.path.getsize(self.db_path) if self.db_path.exists() else 0
@@ -1023,8 +1468,40 @@ class DatabaseManager:
             'saved': size_before - size_after
         }
     
-    def analyze_database(self):
-        """更新查询优化器统计信息（轻量级，扫描后自动调用）"""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("ANALYZE")
+    def _incremental_vacuum(self, max_pages: int) -> None:
+        """增量回收最多 max_pages 个空闲页（处于外层事务中时跳过）
+        
+        sqlite3 模块的 execute 对该 PRAGMA 只单步执行一次（仅回收一页），
+        改用 executescript 由 sqlite3_exec 执行到底；executescript 会先提交未完成的事务，
+        因此只在没有外层事务时执行。
+        """
+        conn = self._get_thread_connection()
+        if self._local.depth or conn.in_transaction:
+            return
+        conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+    
+    def compact(self):
+        """完整压缩数据库（VACUUM 重写整个文件，耗时较长，适合空闲时调用）"""
+        # VACUUM 不能在事务中执行，直接使用线程连接（自动提交模式）
+        self._get_thread_connection().execute("VACUUM")
+    
+    def analyze_database(self) -> Future:
+        """更新查询优化器统计信息（扫描后自动调用）
+        
+        在后台维护线程中执行（该线程使用自己的连接），不阻塞界面和扫描线程；
+        需要等待完成时可调用返回值的 result()。
+        """
+        with self._pool_lock:
+            if self._maintenance_executor is None:
+                self._maintenance_executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="db-maintenance"
+                )
+            return self._maintenance_executor.submit(self._analyze_sync)
+    
+    def _analyze_sync(self) -> None:
+        """执行 ANALYZE（在维护线程中运行）"""
+        try:
+            with self._get_connection() as conn:
+                conn.execute("ANALYZE")
+        except sqlite3.Error as e:
+            logger.warning(f"更新数据库统计信息失败: {e}")
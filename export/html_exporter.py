@@ -4,27 +4,56 @@ https://github.com/Wangtengzhou/FileRecorder
 
 HTML 导出模块 - 生成可离线浏览的单 HTML 文件
 """
+import base64
 import json
 import os
+import time
+import zlib
 from pathlib import Path
-from typing import Callable, Optional
-from datetime import datetime
+from typing import Callable, Iterable, Iterator, Optional
 
 from logger import get_logger
 
 logger = get_logger("export")
 
+# JSON 序列化：安装了 orjson 时使用（编码速度快数倍），否则回退到标准库
+try:
+    import orjson
+    
+    def _dumps_bytes(data) -> bytes:
+        """序列化为紧凑的 UTF-8 JSON 字节串"""
+        return orjson.dumps(data)
+except ImportError:
+    def _dumps_bytes(data) -> bytes:
+        """序列化为紧凑的 UTF-8 JSON 字节串"""
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+# 模板中数据注入位置的占位符
+_DATA_PLACEHOLDER = "/*{{DATA_PLACEHOLDER}}*/"
+
+# 导出的修改时间以 2000-01-01 UTC 起的分钟数表示（页面只显示到分钟），
+# 比秒级 Unix 时间戳每个文件少约 2 个字符；模板中 MTIME_EPOCH 须与此一致
+_MTIME_EPOCH = 946684800
+
+
 class HtmlExporter:
     """HTML 导出器"""
     
-    def __init__(self, db_manager):
+    # 模板在占位符前后两段的 UTF-8 字节缓存，在各实例间共享：
+    # (模板文件 mtime_ns 或 None 表示内置模板, 前段, 后段)
+    _template_cache: Optional[tuple[Optional[int], bytes, bytes]] = None
+    
+    def __init__(self, db_manager, compress: bool = False):
         """
         初始化导出器
         
         Args:
             db_manager: 数据库管理器实例
+            compress: 是否以 gzip + base64 形式内嵌数据（文件显著变小，
+                      打开时由浏览器 DecompressionStream 解压，数据稍晚可用）
         """
         self.db = db_manager
+        self.compress = compress
         self.template_path = Path(__file__).parent / "template.html"
     
     def export(self, output_path: str, progress_callback: Optional[Callable] = None) -> bool:
@@ -43,43 +72,46 @@ class HtmlExporter:
             if progress_callback:
                 progress_callback(0, 100, "正在读取数据库...")
             
-            files = self._get_all_files()
-            total_items = len(files)
-            # 统计文件和文件夹数量
-            total_files = sum(1 for f in files if not f[4])  # is_dir = 0
-            total_folders = sum(1 for f in files if f[4])    # is_dir = 1
+            # 统计文件和文件夹数量（由 SQLite 聚合，不需要先载入全部记录）
+            total_files, total_folders = self._count_items()
             
             if progress_callback:
                 progress_callback(20, 100, f"读取到 {total_files} 个文件和 {total_folders} 个文件夹，正在构建树形结构...")
             
-            # 2. 构建树形结构
-            tree = self._build_tree(files)
+            # 2. 边读取边构建树形结构
+            tree = self._build_tree(self._iter_files())
             
             if progress_callback:
                 progress_callback(60, 100, "正在生成 HTML...")
             
-            # 3. 生成 JSON 数据
-            data = {
-                "metadata": {
-                    "generated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "totalFiles": total_files,
-                    "totalFolders": total_folders,
-                    "source": "FileRecorder"
-                },
-                "tree": tree
+            # 3. 生成元数据并读取模板
+            metadata = {
+                "generated": int(time.time()),  # Unix 时间戳，由页面按本地时区格式化
+                "totalFiles": total_files,
+                "totalFolders": total_folders,
+                "source": "FileRecorder",
+                "sorted": "n"  # 子目录和文件已按名称升序排列（不区分大小写）
             }
-            
-            # 4. 读取模板并替换
-            template = self._read_template()
-            json_data = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
-            html_content = template.replace("/*{{DATA_PLACEHOLDER}}*/", f"const DATA = {json_data};")
+            head, tail = self._get_template_parts()
             
             if progress_callback:
                 progress_callback(80, 100, "正在写入文件...")
             
-            # 5. 写入文件
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            # 4. 按顺序流式写入模板前段、数据、模板后段，不在内存中拼接整个 HTML
+            chunks = self._iter_json_chunks(metadata, tree)
+            with open(output_path, 'wb', buffering=1 << 20) as f:
+                f.write(head)
+                if self.compress:
+                    # DATA 由模板初始化代码解压后赋值
+                    f.write(b'let DATA;\nconst DATA_GZ = "')
+                    f.write(self._gzip_base64(chunks))
+                    f.write(b'";')
+                else:
+                    f.write(b"const DATA = ")
+                    for chunk in chunks:
+                        f.write(chunk)
+                    f.write(b";")
+                f.write(tail)
             
             if progress_callback:
                 progress_callback(100, 100, "导出完成")
@@ -90,71 +122,209 @@ class HtmlExporter:
             logger.warning(f"HTML 导出失败: {e}")
             return False
     
-    def _get_all_files(self) -> list:
-        """获取所有文件记录"""
-        with self.db._get_connection() as conn:
-            cursor = conn.execute("""
-                SELECT f.filename, f.extension, f.size_bytes, f.mtime, f.is_dir, fo.path
+    @staticmethod
+    def _iter_json_chunks(metadata: dict, tree: list) -> Iterator[bytes]:
+        """
+        分段生成 {"metadata": ..., "tree": [...]} 的 JSON 字节串
+        
+        按顶级目录逐个序列化，内存中只保留单个顶级目录的 JSON。
+        """
+        yield b'{"metadata":'
+        yield _dumps_bytes(metadata)
+        yield b',"tree":['
+        for i, root in enumerate(tree):
+            if i:
+                yield b","
+            yield _dumps_bytes(root)
+        yield b"]}"
+    
+    @staticmethod
+    def _gzip_base64(chunks: Iterable[bytes]) -> bytes:
+        """将 JSON 分段流式 gzip 压缩后整体 base64 编码"""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip 格式
+        compressed = [compressor.compress(chunk) for chunk in chunks]
+        compressed.append(compressor.flush())
+        return base64.b64encode(b"".join(compressed))
+    
+    def _count_items(self) -> tuple[int, int]:
+        """统计文件数和文件夹数
+        
+        Returns:
+            (文件数, 文件夹数)
+        """
+        total_files = total_folders = 0
+        with self.db._get_connection(immediate=False) as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute("""
+                SELECT f.is_dir, COUNT(*)
                 FROM files f
                 JOIN folders fo ON f.folder_id = fo.id
-                ORDER BY fo.path, f.is_dir DESC, f.filename
+                GROUP BY f.is_dir
             """)
-            return cursor.fetchall()
+            for is_dir, count in cursor:
+                if is_dir:
+                    total_folders += count
+                else:
+                    total_files += count
+        return total_files, total_folders
     
-    def _build_tree(self, files: list) -> list:
+    def _iter_files(self, batch_size: int = 10000) -> Iterator[tuple]:
+        """逐批读取所有文件记录（生成器，峰值内存只与 batch_size 有关）
+        
+        迭代期间在独立的只读连接上保持读事务，期间处理界面事件触发的其他数据库操作
+        不会并入该事务。
+        
+        Yields:
+            (filename, size_bytes, mtime, is_dir, folder_path) 元组，
+            mtime 为 _MTIME_EPOCH 起的分钟数，向下取整（SQLite 整数除法向零截断，
+            2000 年以前的时间先减 59 再除，避免显示时间推后最多一分钟；无修改时间时为 None），
+            folder_path 中的 '/' 已统一为 '\\'
+        """
+        with self.db._read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None  # 按位置解包即可，返回纯元组避免逐行构造 Row 对象
+            cursor.execute("""
+                SELECT f.filename, f.size_bytes,
+                       CASE WHEN CAST(f.mtime AS INTEGER) != 0
+                            THEN (CAST(f.mtime AS INTEGER) - {epoch}
+                                  - CASE WHEN CAST(f.mtime AS INTEGER) < {epoch} THEN 59 ELSE 0 END) / 60 END,
+                       f.is_dir,
+                       REPLACE(fo.path, '/', '\\')
+                FROM files f
+                JOIN folders fo ON f.folder_id = fo.id
+                ORDER BY fo.path, f.is_dir DESC, f.filename COLLATE NOCASE
+            """.format(epoch=_MTIME_EPOCH))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+    
+    def _build_tree(self, files: Iterable[tuple]) -> list:
         """
         将平铺文件列表构建为树形结构
         
         Returns:
             树形结构列表（顶级目录列表）
         """
-        # 使用字典存储目录节点
+        # 使用字典存储目录节点（键为规范化后的完整路径）
         nodes = {}
         roots = []
-        
-        for row in files:
-            name, ext, size, mtime, is_dir, full_path = row
-            
-            # 解析路径
-            path_parts = full_path.replace('/', '\\').split('\\')
-            
-            # 逐级创建目录节点
-            current_path = ""
-            parent_node = None
-            
-            for i, part in enumerate(path_parts):
-                if not part:
-                    continue
-                    
-                current_path = current_path + "\\" + part if current_path else part
-                
-                if current_path not in nodes:
-                    node = {
-                        "n": part,
-                        "c": [],  # children (dirs)
-                        "f": []   # files
-                    }
-                    nodes[current_path] = node
-                    
-                    if parent_node is None:
-                        # 这是顶级目录
-                        roots.append(node)
-                    else:
-                        parent_node["c"].append(node)
-                
-                parent_node = nodes[current_path]
+        # SQL 已按路径排序，同一目录的记录连续出现，缓存上一行的目录节点
+        last_path = None
+        add_file = None
+        get_dir_node = self._get_dir_node
+        
+        for name, size, mtime, is_dir, full_path in files:
+            if full_path != last_path:
+                last_path = full_path
+                parent_node = get_dir_node(full_path, nodes, roots)
+                # 绑定当前目录文件列表的 append，同目录的后续行直接调用
+                add_file = parent_node["f"].append if parent_node else None
             
             # 添加文件到当前目录
-            if parent_node and not is_dir:
+            if add_file is not None and not is_dir:
                 file_entry = {"n": name}
                 if size:
                     file_entry["s"] = size
-                if mtime:
-                    file_entry["t"] = int(mtime) if mtime else 0
-                parent_node["f"].append(file_entry)
+                if mtime is not None:
+                    file_entry["t"] = mtime  # SQL 中已换算为分钟数
+                add_file(file_entry)
         
+        self._finalize_tree(roots)
         return roots
     
+    @staticmethod
+    def _finalize_tree(roots: list) -> None:
+        """
+        后序遍历目录树：将每个目录（含子目录）的总体积写入 S 字段，
+        并将子目录和文件按名称（不区分大小写）排序
+        
+        页面默认的"按名称升序"与此顺序一致，可直接显示而无需排序；
+        文件在 SQL 中已按 NOCASE 排序，这里的排序基本是线性的校验。
+        """
+        name_key = lambda entry: entry["n"].lower()
+        roots.sort(key=name_key)
+        # 显式栈迭代，避免深层目录时的递归开销
+        stack = [(node, False) for node in roots]
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                node["c"].sort(key=name_key)
+                node["f"].sort(key=name_key)
+                total = sum(child["S"] for child in node["c"])
+                for file_entry in node["f"]:
+                    total += file_entry.get("s", 0)
+                node["S"] = total
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node["c"])
+    
+    @staticmethod
+    def _get_dir_node(full_path: str, nodes: dict, roots: list) -> Optional[dict]:
+        """
+        获取目录路径对应的节点，缺失的各级目录节点按需创建
+        
+        Args:
+            full_path: 以 '\\' 分隔的目录路径（_iter_files 已在 SQL 中规范化）
+        
+        Returns:
+            目录节点，路径为空时返回 None
+        """
+        parts = [part for part in full_path.split('\\') if part]
+        if not parts:
+            return None
+        
+        node = nodes.get('\\'.join(parts))
+        if node is not None:
+            return node
+        
+        # 从深到浅找到最近的已存在祖先，只为缺失的层级拼接路径键
+        depth = len(parts) - 1
+        parent_node = None
+        while depth > 0:
+            parent_node = nodes.get('\\'.join(parts[:depth]))
+            if parent_node is not None:
+                break
+            depth -= 1
+        
+        for i in range(depth, len(parts)):
+            node = {
+                "n": parts[i],
+                "c": [],  # children (dirs)
+                "f": []   # files
+            }
+            nodes['\\'.join(parts[:i + 1])] = node
+            if parent_node is None:
+                # 这是顶级目录
+                roots.append(node)
+            else:
+                parent_node["c"].append(node)
+            parent_node = node
+        
+        return node
+    
+    def _get_template_parts(self) -> tuple[bytes, bytes]:
+        """获取模板在数据占位符前后两段的 UTF-8 字节串
+        
+        结果按模板文件的修改时间缓存在类上，每次导出都新建实例时
+        也无需重复读取、查找占位符和编码；模板文件被修改后自动失效。
+        """
+        try:
+            version = self.template_path.stat().st_mtime_ns
+        except OSError:
+            version = None  # 使用内置模板
+        
+        cached = HtmlExporter._template_cache
+        if cached is not None and cached[0] == version:
+            return cached[1], cached[2]
+        
+        head, _, tail = self._read_template().partition(_DATA_PLACEHOLDER)
+        head_bytes, tail_bytes = head.encode('utf-8'), tail.encode('utf-8')
+        HtmlExporter._template_cache = (version, head_bytes, tail_bytes)
+        return head_bytes, tail_bytes
+    
     def _read_template(self) -> str:
         """读取 HTML 模板"""
         if self.template_path.exists():
@@ -490,10 +660,21 @@ class HtmlExporter:
         .file-list {
             flex: 1;
             overflow: auto;
+            position: relative;
+        }
+        
+        /* 虚拟列表：只有可视区域内的行在 DOM 中，由 transform 定位 */
+        .file-list-rows {
+            position: absolute;
+            top: 0;
+            left: 0;
+            right: 0;
         }
         
         .file-item {
             display: flex;
+            align-items: center;
+            height: 30px;  /* 与脚本中的 ROW_HEIGHT 一致 */
             border-bottom: 1px solid var(--border-color);
         }
         
@@ -563,6 +744,16 @@ class HtmlExporter:
             background: #665c00;
             color: #fff;
         }
+        
+        ::highlight(search-keyword) {
+            background-color: #ffff00;
+            color: #000;
+        }
+        
+        [data-theme="dark"] ::highlight(search-keyword) {
+            background-color: #665c00;
+            color: #fff;
+        }
     </style>
 </head>
 <body>
@@ -608,6 +799,7 @@ class HtmlExporter:
                 <div class="col-date" id="sortDate" data-sort="date">修改时间</div>
             </div>
             <div class="file-list" id="fileList"></div>
+            <template id="rowTpl"><div class="file-item"><div class="col-name"><span class="file-icon"></span><span></span></div><div class="col-size"></div><div class="col-date"></div></div></template>
         </div>
     </div>
     
@@ -626,6 +818,22 @@ class HtmlExporter:
             chevron: '<svg viewBox="0 0 16 16"><path d="M4.646 1.646a.5.5 0 0 1 .708 0l6 6a.5.5 0 0 1 0 .708l-6 6a.5.5 0 0 1-.708-.708L10.293 8 4.646 2.354a.5.5 0 0 1 0-.708z"/></svg>'
         };
         
+        // 图标 SVG 每种只解析一次，之后逐行克隆节点（key 为 图标名|填充色）
+        const ICON_NODES = {};
+        
+        function cloneIcon(name, fill = '') {
+            const key = name + '|' + fill;
+            let node = ICON_NODES[key];
+            if (!node) {
+                const holder = document.createElement('div');
+                holder.innerHTML = ICONS[name];
+                node = holder.firstElementChild;
+                if (fill) node.style.fill = fill;
+                ICON_NODES[key] = node;
+            }
+            return node.cloneNode(true);
+        }
+        
         let selectedNode = null;
         let currentTheme = 'auto';
         
@@ -672,27 +880,44 @@ class HtmlExporter:
         }
         
         // Format helpers
+        const SIZE_UNITS = ['B', 'KB', 'MB', 'GB', 'TB'];
+        
         function formatSize(bytes) {
             if (!bytes) return '-';
-            const units = ['B', 'KB', 'MB', 'GB', 'TB'];
             let i = 0;
-            while (bytes >= 1024 && i < units.length - 1) {
+            while (bytes >= 1024 && i < SIZE_UNITS.length - 1) {
                 bytes /= 1024;
                 i++;
             }
-            return bytes.toFixed(i > 0 ? 1 : 0) + ' ' + units[i];
+            return bytes.toFixed(i > 0 ? 1 : 0) + ' ' + SIZE_UNITS[i];
+        }
+        
+        // 修改时间以 MTIME_EPOCH 起的分钟数导出
+        const MTIME_EPOCH = 946684800;
+        
+        // 格式化器只创建一次：toLocaleDateString 等每次调用都会重新构造 Intl 格式化器，开销很大
+        const DATE_FORMAT = new Intl.DateTimeFormat('zh-CN', { year: 'numeric', month: '2-digit', day: '2-digit' });
+        const TIME_FORMAT = new Intl.DateTimeFormat('zh-CN', { hour: '2-digit', minute: '2-digit', hour12: false });
+        
+        function formatDate(minutes) {
+            if (minutes === undefined || minutes === null) return '-';
+            const d = new Date((minutes * 60 + MTIME_EPOCH) * 1000);
+            return DATE_FORMAT.format(d) + ' ' + TIME_FORMAT.format(d);
         }
         
-        function formatDate(timestamp) {
-            if (!timestamp) return '-';
-            const d = new Date(timestamp * 1000);
-            const date = d.toLocaleDateString('zh-CN', { year: 'numeric', month: '2-digit', day: '2-digit' });
-            const time = d.toLocaleTimeString('zh-CN', { hour: '2-digit', minute: '2-digit', hour12: false });
-            return date + ' ' + time;
+        function formatGenerated(timestamp) {
+            return new Date(timestamp * 1000).toLocaleString('zh-CN', { hour12: false });
         }
         
         // Build tree
+        // 数据节点 -> 侧边栏中对应的 DOM 元素，用于按节点直接定位（同名文件夹也不会混淆）
+        const treeElements = new WeakMap();
+        
+        // 只构建传入的这一层节点；子目录的 DOM 在首次展开时由 expandTreeItem 按需构建，
+        // 启动时不再一次性创建整棵目录树
         function buildTree(nodes, container) {
+            // 先在 DocumentFragment 中构建，最后一次性插入容器，只触发一次重排
+            const fragment = document.createDocumentFragment();
             nodes.forEach(node => {
                 const item = document.createElement('div');
                 item.className = 'tree-item';
@@ -704,12 +929,14 @@ class HtmlExporter:
                 
                 const toggle = document.createElement('span');
                 toggle.className = 'tree-toggle';
-                toggle.innerHTML = hasChildren ? ICONS.chevron : '';
+                if (hasChildren) {
+                    toggle.appendChild(cloneIcon('chevron'));
+                }
                 content.appendChild(toggle);
                 
                 const icon = document.createElement('span');
                 icon.className = 'tree-icon';
-                icon.innerHTML = ICONS.folder;
+                icon.appendChild(cloneIcon('folder'));
                 content.appendChild(icon);
                 
                 const label = document.createElement('span');
@@ -719,19 +946,15 @@ class HtmlExporter:
                 
                 item.appendChild(content);
                 
-                if (hasChildren) {
-                    const children = document.createElement('div');
-                    children.className = 'tree-children';
-                    buildTree(node.c, children);
-                    item.appendChild(children);
-                }
-                
                 // 点击箭头只展开/收起
                 toggle.addEventListener('click', (e) => {
                     e.stopPropagation();
                     e.preventDefault();
-                    if (hasChildren) {
-                        item.classList.toggle('expanded');
+                    if (!hasChildren) return;
+                    if (item.classList.contains('expanded')) {
+                        item.classList.remove('expanded');
+                    } else {
+                        expandTreeItem(node);
                     }
                 });
                 
@@ -745,8 +968,24 @@ class HtmlExporter:
                     selectNode(node, content, item);
                 });
                 
-                container.appendChild(item);
+                treeElements.set(node, {content, item, childrenBuilt: !hasChildren});
+                fragment.appendChild(item);
             });
+            container.appendChild(fragment);
+        }
+        
+        // 展开树节点，首次展开时才构建其子目录的 DOM
+        function expandTreeItem(node) {
+            const elements = treeElements.get(node);
+            if (!elements) return;
+            if (!elements.childrenBuilt) {
+                const children = document.createElement('div');
+                children.className = 'tree-children';
+                buildTree(node.c, children);
+                elements.item.appendChild(children);
+                elements.childrenBuilt = true;
+            }
+            elements.item.classList.add('expanded');
         }
         
         function selectNode(node, element, treeItem, pushHistory = true) {
@@ -757,11 +996,12 @@ class HtmlExporter:
             element.classList.add('selected');
             // 展开选中的文件夹
             if (treeItem) {
-                treeItem.classList.add('expanded');
+                expandTreeItem(node);
             }
             currentNode = node;
             currentPath = getNodePath(node);
             isShowingSearchResults = false;
+            searchSeq++;  // 中止尚未完成的搜索
             showFolderContents(node);
             
             // 添加到历史记录
@@ -790,22 +1030,10 @@ class HtmlExporter:
         function updateFooterInfo() {
             if (!currentNode) return;
             
-            // 递归计算文件夹总体积
-            function calcSize(node) {
-                let size = 0;
-                if (node.f) {
-                    node.f.forEach(f => size += (f.s || 0));
-                }
-                if (node.c) {
-                    node.c.forEach(child => size += calcSize(child));
-                }
-                return size;
-            }
-            
-            // 计算当前文件夹的统计信息
+            // 计算当前文件夹的统计信息（总体积在导出时已预先汇总到 S 字段）
             const folderCount = currentNode.c ? currentNode.c.length : 0;
             const fileCount = currentNode.f ? currentNode.f.length : 0;
-            const totalSize = calcSize(currentNode);
+            const totalSize = currentNode.S || 0;
             
             document.getElementById('footerLeft').textContent = 
                 `${folderCount} 个文件夹、${fileCount} 个文件，共 ${formatSize(totalSize)}`;
@@ -816,37 +1044,88 @@ class HtmlExporter:
             const f = DATA.metadata.totalFiles.toLocaleString();
             const d = DATA.metadata.totalFolders ? DATA.metadata.totalFolders.toLocaleString() : '0';
             document.getElementById('footerLeft').textContent = 
-                `共 ${f} 个文件、${d} 个文件夹 · 生成于 ${DATA.metadata.generated}`;
+                `共 ${f} 个文件、${d} 个文件夹 · 生成于 ${formatGenerated(DATA.metadata.generated)}`;
             document.getElementById('footerRight').textContent = '';
         }
         
+        // 虚拟列表：文件列表只为可视区域（上下各留 ROW_BUFFER 行）创建 DOM 行
+        const ROW_HEIGHT = 30;  // 与 .file-item 的 CSS 高度一致
+        const ROW_BUFFER = 10;
+        
+        class VirtualList {
+            constructor(container) {
+                this.container = container;
+                this.count = 0;
+                this.renderRow = null;  // (index) => HTMLElement
+                this.onRender = null;
+                this.first = -1;
+                this.last = -1;
+                // spacer 撑起完整滚动高度，rows 只容纳当前渲染的行
+                this.spacer = document.createElement('div');
+                this.rows = document.createElement('div');
+                this.rows.className = 'file-list-rows';
+                container.replaceChildren(this.spacer, this.rows);
+                container.addEventListener('scroll', () => this.render(), {passive: true});
+                window.addEventListener('resize', () => this.render(), {passive: true});
+            }
+            
+            setItems(count, renderRow, onRender = null) {
+                this.count = count;
+                this.renderRow = renderRow;
+                this.onRender = onRender;  // (rowsContainer) => void，每次渲染后调用
+                this.spacer.style.height = (count * ROW_HEIGHT) + 'px';
+                this.container.scrollTop = 0;
+                this.first = this.last = -1;
+                this.render();
+            }
+            
+            render() {
+                const first = Math.max(0, Math.floor(this.container.scrollTop / ROW_HEIGHT) - ROW_BUFFER);
+                const visible = Math.ceil(this.container.clientHeight / ROW_HEIGHT) + ROW_BUFFER * 2;
+                const last = Math.min(this.count, first + visible);
+                if (first === this.first && last === this.last) return;
+                this.first = first;
+                this.last = last;
+                
+                const rows = [];
+                for (let i = first; i < last; i++) {
+                    rows.push(this.renderRow(i));
+                }
+                this.rows.style.transform = `translateY(${first * ROW_HEIGHT}px)`;
+                this.rows.replaceChildren(...rows);
+                if (this.onRender) this.onRender(this.rows);
+            }
+        }
+        
+        let fileList = null;
+        
         // 排序相关
         let currentSort = {field: 'name', asc: true};
         let currentNode = null;
         let currentPath = '';
-        let currentItems = [];
-        
-        function sortItems(items, field, asc) {
-            return [...items].sort((a, b) => {
-                // 文件夹永远在前
-                if (a.isDir !== b.isDir) return a.isDir ? -1 : 1;
-                
-                let va, vb;
-                if (field === 'name') {
-                    va = a.n.toLowerCase();
-                    vb = b.n.toLowerCase();
-                } else if (field === 'size') {
-                    va = a.s || 0;
-                    vb = b.s || 0;
-                } else if (field === 'date') {
-                    va = a.t || 0;
-                    vb = b.t || 0;
-                }
-                
-                if (va < vb) return asc ? -1 : 1;
-                if (va > vb) return asc ? 1 : -1;
-                return 0;
-            });
+        // 对下标排列排序（文件夹永远在前）：子目录和文件本就分处 [0, dirCount) 与
+        // [dirCount, n) 两段，各自原地排序即可，比较函数无需再判断是否为文件夹；
+        // 数值列用单次减法比较连续的 Float64Array，相等时返回 0 以保持稳定排序
+        function sortIndices(columns, field, asc) {
+            const n = columns.names.length;
+            const dirCount = columns.dirCount;
+            const order = new Uint32Array(n);
+            for (let i = 0; i < n; i++) order[i] = i;
+            
+            let compare;
+            if (field === 'size' || field === 'date') {
+                const keys = field === 'size' ? columns.sizes : columns.times;
+                compare = asc ? (a, b) => keys[a] - keys[b] : (a, b) => keys[b] - keys[a];
+            } else {
+                const keys = columns.names;
+                const sign = asc ? 1 : -1;
+                compare = (a, b) => keys[a] < keys[b] ? -sign : keys[a] > keys[b] ? sign : 0;
+            }
+            
+            // 文件夹的大小和时间都按 0 处理，只有按名称排序时才需要排子目录段
+            if (field === 'name') order.subarray(0, dirCount).sort(compare);
+            order.subarray(dirCount).sort(compare);
+            return order;
         }
         
         function updateSortUI() {
@@ -872,203 +1151,218 @@ class HtmlExporter:
         }
         
         function renderCurrentItems() {
-            const list = document.getElementById('fileList');
-            list.innerHTML = '';
+            if (searchHighlight) searchHighlight.clear();
+            if (!currentNode) {
+                fileList.setItems(0, null);
+                return;
+            }
             
-            const sorted = sortItems(currentItems, currentSort.field, currentSort.asc);
+            // 导出数据已按名称升序排列（文件夹在前）：默认排序方式下直接按下标读取节点的
+            // 子目录和文件，无需构造带 isDir 标记的中间数组，也无需排序
+            if (DATA.metadata.sorted === 'n' && currentSort.field === 'name' && currentSort.asc) {
+                const dirs = currentNode.c;
+                const files = currentNode.f;
+                fileList.setItems(dirs.length + files.length, i => i < dirs.length
+                    ? createItemRow(dirs[i], true)
+                    : createItemRow(files[i - dirs.length], false));
+                return;
+            }
             
-            sorted.forEach(item => {
-                const row = document.createElement('div');
-                row.className = item.isDir ? 'file-item folder-item' : 'file-item';
-                
-                const name = document.createElement('div');
-                name.className = 'col-name';
-                
-                const icon = document.createElement('span');
-                icon.className = 'file-icon';
-                icon.innerHTML = item.isDir ? ICONS.folder : ICONS.file;
-                if (item.isDir) {
-                    icon.querySelector('svg').style.fill = 'var(--icon-folder)';
-                }
-                name.appendChild(icon);
-                
-                const label = document.createElement('span');
-                label.textContent = item.n;
-                name.appendChild(label);
-                
-                const size = document.createElement('div');
-                size.className = 'col-size';
-                size.textContent = item.isDir ? '-' : formatSize(item.s);
-                
-                const date = document.createElement('div');
-                date.className = 'col-date';
-                date.textContent = item.isDir ? '-' : formatDate(item.t);
-                
-                row.appendChild(name);
-                row.appendChild(size);
-                row.appendChild(date);
-                
-                // 文件夹可点击跳转
-                if (item.isDir && item.nodeRef) {
-                    row.addEventListener('click', () => {
-                        navigateToNode(item.nodeRef);
-                    });
-                }
-                
-                list.appendChild(row);
+            const dirs = currentNode.c;
+            const files = currentNode.f;
+            const order = getSortedOrder(currentNode, currentSort.field, currentSort.asc);
+            fileList.setItems(order.length, i => {
+                const idx = order[i];
+                return idx < dirs.length
+                    ? createItemRow(dirs[idx], true)
+                    : createItemRow(files[idx - dirs.length], false);
             });
         }
         
-        function navigateToNode(node) {
-            // 在树中找到对应节点并选中
-            const treeItems = document.querySelectorAll('.tree-item');
-            for (const treeItem of treeItems) {
-                const content = treeItem.querySelector('.tree-item-content');
-                const label = content.querySelector('.tree-label');
-                if (label && label.textContent === node.n) {
-                    // 检查是否是同一个节点（通过父节点路径）
-                    selectNode(node, content, treeItem);
-                    // 确保树节点可见
-                    content.scrollIntoView({behavior: 'smooth', block: 'nearest'});
-                    break;
-                }
+        // 文件列表行模板：克隆整行结构，代替逐个 createElement/appendChild
+        let rowTemplate = null;
+        
+        function cloneRowTemplate() {
+            if (!rowTemplate) {
+                rowTemplate = document.getElementById('rowTpl').content.firstElementChild;
             }
+            return rowTemplate.cloneNode(true);
         }
         
-        function showFolderContents(node) {
-            currentItems = [];
+        // 创建文件列表中的一行（文件夹行点击跳转到对应节点）
+        function createItemRow(item, isDir) {
+            const row = cloneRowTemplate();
+            const [name, size, date] = row.children;
+            const [icon, label] = name.children;
             
-            // 添加子文件夹
-            if (node.c && node.c.length > 0) {
-                node.c.forEach(child => {
-                    currentItems.push({
-                        n: child.n,
-                        s: 0,
-                        t: 0,
-                        isDir: true,
-                        nodeRef: child
-                    });
-                });
+            icon.appendChild(cloneIcon(isDir ? 'folder' : 'file', isDir ? 'var(--icon-folder)' : ''));
+            if (isDir) {
+                row.classList.add('folder-item');
             }
+            label.textContent = item.n;
+            // 格式化结果缓存在条目的 _sf/_df 字段，排序或滚动重新渲染时直接复用
+            size.textContent = isDir ? '-' : (item._sf ??= formatSize(item.s));
+            date.textContent = isDir ? '-' : (item._df ??= formatDate(item.t));
             
-            // 添加文件
-            if (node.f && node.f.length > 0) {
-                node.f.forEach(file => {
-                    currentItems.push({
-                        n: file.n,
-                        s: file.s,
-                        t: file.t,
-                        isDir: false
-                    });
-                });
+            // 文件夹可点击跳转（点击由文件列表容器统一委托处理）
+            if (isDir) {
+                folderRows.set(row, item);
             }
             
+            return row;
+        }
+        
+        // 文件夹行 -> 对应的树节点，供文件列表的委托点击处理查找
+        const folderRows = new WeakMap();
+        
+        function navigateToNode(node) {
+            // 在树中找到对应节点并选中
+            const elements = treeElements.get(node);
+            if (elements) {
+                selectNode(node, elements.content, elements.item);
+                // 确保树节点可见
+                elements.content.scrollIntoView({behavior: 'smooth', block: 'nearest'});
+            }
+        }
+        
+        // 一次遍历构造文件夹的排序列（结构数组，下标 < dirCount 的是子目录），
+        // 仅在需要按其他方式排序时才构造，并缓存在节点的 _cols 字段上供再次访问时复用
+        function getNodeColumns(node) {
+            if (node._cols === undefined) {
+                const dirs = node.c;
+                const files = node.f;
+                const count = dirs.length + files.length;
+                const names = new Array(count);
+                const sizes = new Float64Array(count);  // 文件夹保持为 0
+                const times = new Float64Array(count);
+                for (let i = 0; i < dirs.length; i++) {
+                    const dir = dirs[i];
+                    names[i] = dir._nl || (dir._nl = dir.n.toLowerCase());
+                }
+                for (let j = 0; j < files.length; j++) {
+                    const file = files[j];
+                    const i = dirs.length + j;
+                    names[i] = file._nl || (file._nl = file.n.toLowerCase());
+                    sizes[i] = file.s || 0;
+                    times[i] = file.t || 0;
+                }
+                node._cols = {dirCount: dirs.length, names, sizes, times, orders: {}};
+            }
+            return node._cols;
+        }
+        
+        // 每种排序方式的下标排列同样缓存，重复访问或来回切换排序时无需重新排序
+        function getSortedOrder(node, field, asc) {
+            const columns = getNodeColumns(node);
+            const key = field + (asc ? '+' : '-');
+            return columns.orders[key] || (columns.orders[key] = sortIndices(columns, field, asc));
+        }
+        
+        function showFolderContents(node) {
             renderCurrentItems();
             updateFooterInfo();
         }
         
-        function showFiles(files, highlight = '') {
-            const list = document.getElementById('fileList');
-            list.innerHTML = '';
-            
-            files.forEach(file => {
-                const item = document.createElement('div');
-                item.className = 'file-item';
-                
-                const name = document.createElement('div');
-                name.className = 'col-name';
-                
-                const icon = document.createElement('span');
-                icon.className = 'file-icon';
-                icon.innerHTML = ICONS.file;
-                name.appendChild(icon);
-                
-                const label = document.createElement('span');
-                if (highlight) {
-                    label.innerHTML = file.n.replace(new RegExp(highlight, 'gi'), '<span class="highlight">$&</span>');
-                } else {
-                    label.textContent = file.n;
+        // regex 为 search() 开始时编译好的关键词正则，渲染和高亮都复用它
+        function showSearchResults(results, regex = null) {
+            const onRender = (regex && searchHighlight)
+                ? rows => updateSearchHighlights(rows, regex)
+                : null;
+            fileList.setItems(results.length, i => createSearchRow(results[i], regex), onRender);
+        }
+        
+        // 关键词高亮：浏览器支持 CSS Custom Highlight API 时，只为当前渲染的行登记 Range，
+        // 标签保持纯文本，不需要拼接和解析 HTML；不支持时回退到 highlightText
+        const HIGHLIGHT_MAX_LENGTH = 30000;  // 超长文本不做高亮
+        const searchHighlight = (window.CSS && CSS.highlights && typeof Highlight !== 'undefined')
+            ? new Highlight()
+            : null;
+        if (searchHighlight) {
+            CSS.highlights.set('search-keyword', searchHighlight);
+        }
+        
+        function updateSearchHighlights(rows, regex) {
+            searchHighlight.clear();
+            for (const row of rows.children) {
+                // 行结构见 #rowTpl：第一列的第二个 span 为名称标签
+                const textNode = row.firstChild.children[1].firstChild;
+                if (!textNode || textNode.length > HIGHLIGHT_MAX_LENGTH) continue;
+                const text = textNode.data;
+                let m;
+                regex.lastIndex = 0;
+                while ((m = regex.exec(text)) !== null) {
+                    const range = new Range();
+                    range.setStart(textNode, m.index);
+                    range.setEnd(textNode, m.index + m[0].length);
+                    searchHighlight.add(range);
                 }
-                name.appendChild(label);
-                
-                const size = document.createElement('div');
-                size.className = 'col-size';
-                size.textContent = formatSize(file.s);
-                
-                const date = document.createElement('div');
-                date.className = 'col-date';
-                date.textContent = formatDate(file.t);
-                
-                item.appendChild(name);
-                item.appendChild(size);
-                item.appendChild(date);
-                list.appendChild(item);
-            });
+            }
+        }
+        
+        // 将关键词转义后合并为一个交替正则（长词优先），无关键词时返回 null
+        function buildKeywordRegex(keywords) {
+            const escaped = (keywords || [])
+                .filter(kw => kw)
+                .sort((a, b) => b.length - a.length)
+                .map(kw => kw.replace(/[.*+?^${}()|[\\]\\\\]/g, '\\\\$&'));
+            return escaped.length ? new RegExp(escaped.join('|'), 'gi') : null;
+        }
+        
+        const HTML_ESCAPES = {'&': '&amp;', '<': '&lt;', '>': '&gt;'};
+        
+        function escapeHtml(text) {
+            return text.replace(/[&<>]/g, c => HTML_ESCAPES[c]);
         }
         
-        function showSearchResults(results, keywords = []) {
-            const list = document.getElementById('fileList');
-            list.innerHTML = '';
+        // 高亮函数：单次扫描文本，匹配片段包裹高亮标签，其余部分转义
+        function highlightText(text, regex) {
+            let html = '';
+            let last = 0;
+            let m;
+            regex.lastIndex = 0;
+            while ((m = regex.exec(text)) !== null) {
+                html += escapeHtml(text.slice(last, m.index)) +
+                    '<span class="highlight">' + escapeHtml(m[0]) + '</span>';
+                last = regex.lastIndex;
+            }
+            return html + escapeHtml(text.slice(last));
+        }
+        
+        // 创建搜索结果中的一行（高亮所有关键词并显示所在路径）
+        function createSearchRow(item, regex) {
+            const row = cloneRowTemplate();
+            const [name, size, date] = row.children;
+            const [icon, label] = name.children;
             
-            // 高亮函数：高亮所有关键词
-            function highlightText(text) {
-                if (!keywords || keywords.length === 0) return text;
-                let result = text;
-                keywords.forEach(kw => {
-                    if (kw) result = result.replace(new RegExp(kw, 'gi'), '<span class="highlight">$&</span>');
-                });
-                return result;
+            // 文件夹图标使用黄色
+            icon.appendChild(cloneIcon(item.isDir ? 'folder' : 'file', item.isDir ? 'var(--icon-folder)' : ''));
+            
+            const displayName = item.isDir ? item.n + ' (文件夹)' : item.n;
+            if (regex && !searchHighlight && displayName.length <= HIGHLIGHT_MAX_LENGTH) {
+                label.innerHTML = highlightText(displayName, regex);
+            } else {
+                label.textContent = displayName;
             }
             
-            results.forEach(item => {
-                const row = document.createElement('div');
-                row.className = 'file-item';
-                
-                const name = document.createElement('div');
-                name.className = 'col-name';
-                
-                const icon = document.createElement('span');
-                icon.className = 'file-icon';
-                icon.innerHTML = item.isDir ? ICONS.folder : ICONS.file;
-                // 文件夹图标使用黄色
-                if (item.isDir) {
-                    icon.querySelector('svg').style.fill = 'var(--icon-folder)';
-                }
-                name.appendChild(icon);
-                
-                const label = document.createElement('span');
-                const displayName = item.isDir ? item.n + ' (文件夹)' : item.n;
-                if (keywords && keywords.length > 0) {
-                    label.innerHTML = highlightText(displayName);
-                } else {
-                    label.textContent = displayName;
-                }
-                name.appendChild(label);
-                
-                // 显示路径
-                if (item.path) {
-                    const pathSpan = document.createElement('span');
-                    pathSpan.style.cssText = 'color: var(--text-secondary); font-size: 11px; margin-left: 8px;';
-                    pathSpan.textContent = item.path;
-                    name.appendChild(pathSpan);
-                }
-                
-                const size = document.createElement('div');
-                size.className = 'col-size';
-                size.textContent = item.isDir ? '-' : formatSize(item.s);
-                
-                const date = document.createElement('div');
-                date.className = 'col-date';
-                date.textContent = item.isDir ? '-' : formatDate(item.t);
-                
-                row.appendChild(name);
-                row.appendChild(size);
-                row.appendChild(date);
-                list.appendChild(row);
-            });
+            // 显示路径
+            if (item.path) {
+                const pathSpan = document.createElement('span');
+                pathSpan.style.cssText = 'color: var(--text-secondary); font-size: 11px; margin-left: 8px;';
+                pathSpan.textContent = item.path;
+                name.appendChild(pathSpan);
+            }
+            
+            size.textContent = item.isDir ? '-' : (item._sf ??= formatSize(item.s));
+            date.textContent = item.isDir ? '-' : (item._df ??= formatDate(item.t));
+            return row;
         }
         
         // Search state
+        const SEARCH_DISPLAY_LIMIT = 1000;
+        const SEARCH_SLICE_SIZE = 500;
+        const SEARCH_DEBOUNCE_MS = 150;
+        let searchSeq = 0;  // 递增的搜索序号，用于中止过期的分片搜索
+        let searchTimer = null;
         let isShowingSearchResults = false;
         let nodeBeforeSearch = null;
         
@@ -1083,49 +1377,250 @@ class HtmlExporter:
             }
             
             isShowingSearchResults = true;
+            const seq = ++searchSeq;
             
             const results = [];
             // 支持空格分隔的多关键词搜索（AND 逻辑）
             const keywords = keyword.toLowerCase().split(/\s+/).filter(k => k.length > 0);
+            // 所有关键词合并为一个高亮正则，每次搜索只编译一次
+            const regex = buildKeywordRegex(keywords);
             
-            function matchesAllKeywords(text) {
-                const lowerText = text.toLowerCase();
-                return keywords.every(kw => lowerText.includes(kw));
+            // 名称的小写形式在首次搜索时缓存到节点的 _nl 字段，之后的搜索直接复用；
+            // 逐个关键词普通循环判断，不为每个条目创建回调闭包
+            function matchesAllKeywords(entry) {
+                const lowerText = entry._nl || (entry._nl = entry.n.toLowerCase());
+                for (let k = 0; k < keywords.length; k++) {
+                    if (!lowerText.includes(keywords[k])) return false;
+                }
+                return true;
             }
             
-            function searchNode(node, path) {
-                // 搜索文件夹名称
-                if (matchesAllKeywords(node.n)) {
-                    results.push({n: node.n, isDir: true, path: path});
+            let total = 0;
+            function addResult(entry, path, isDir) {
+                if (total++ < SEARCH_DISPLAY_LIMIT) {
+                    results.push(isDir ? {n: entry.n, isDir: true, path: path} : {...entry, path: path});
                 }
-                // 搜索文件
-                if (node.f) {
-                    node.f.forEach(file => {
-                        if (matchesAllKeywords(file.n)) {
-                            results.push({...file, path: path});
+            }
+            
+            function finish() {
+                showSearchResults(results, regex);
+                
+                let footerText = `搜索 "${keyword}" - ${total} 个结果`;
+                if (total > SEARCH_DISPLAY_LIMIT) {
+                    footerText += ` (显示前 ${SEARCH_DISPLAY_LIMIT} 条)`;
+                }
+                document.getElementById('footerLeft').textContent = footerText;
+                document.getElementById('footerRight').textContent = '搜索结果';
+            }
+            
+            // 索引已就绪且关键词可拆出三元组时，只需逐个校验倒排表交集中的候选条目；
+            // 候选按遍历顺序编号，结果顺序与全树遍历一致
+            const candidates = searchIndex ? lookupCandidates(keywords) : null;
+            if (candidates !== null) {
+                const {entries, paths, dirFlags} = searchIndex;
+                let cursor = 0;
+                const indexedStep = (deadline) => {
+                    if (seq !== searchSeq) return;
+                    let processed = 0;
+                    while (cursor < candidates.length) {
+                        const id = candidates[cursor++];
+                        if (matchesAllKeywords(entries[id])) {
+                            addResult(entries[id], paths[id], dirFlags[id] === 1);
+                        }
+                        if (++processed >= SEARCH_SLICE_SIZE) {
+                            processed = 0;
+                            if (deadline.timeRemaining() < 1) {
+                                scheduleIdle(indexedStep);
+                                return;
+                            }
                         }
-                    });
+                    }
+                    finish();
+                };
+                document.getElementById('footerLeft').textContent = `正在搜索 "${keyword}"...`;
+                scheduleIdle(indexedStep);
+                return;
+            }
+            
+            // 显式栈深度优先遍历（与递归顺序一致）：节点和路径分两个栈存放，
+            // 只保留前 SEARCH_DISPLAY_LIMIT 条结果，其余只计数
+            const nodeStack = [];
+            const pathStack = [];
+            for (let i = DATA.tree.length - 1; i >= 0; i--) {
+                nodeStack.push(DATA.tree[i]);
+                pathStack.push('');
+            }
+            
+            // 分片遍历：每处理约 SEARCH_SLICE_SIZE 个条目检查一次空闲时间，
+            // 用完则让出主线程，避免大目录树搜索时页面卡顿
+            function step(deadline) {
+                if (seq !== searchSeq) return;  // 已开始新的搜索或已离开搜索结果
+                let processed = 0;
+                while (nodeStack.length > 0) {
+                    const node = nodeStack.pop();
+                    const path = pathStack.pop();
+                    // 搜索文件夹名称
+                    if (matchesAllKeywords(node)) {
+                        addResult(node, path, true);
+                    }
+                    // 搜索文件
+                    if (node.f) {
+                        for (const file of node.f) {
+                            if (matchesAllKeywords(file)) {
+                                addResult(file, path, false);
+                            }
+                        }
+                        processed += node.f.length;
+                    }
+                    // 子目录逆序入栈，保证按原顺序出栈
+                    if (node.c && node.c.length > 0) {
+                        const newPath = path ? path + '\\\\' + node.n : node.n;
+                        for (let i = node.c.length - 1; i >= 0; i--) {
+                            nodeStack.push(node.c[i]);
+                            pathStack.push(newPath);
+                        }
+                    }
+                    
+                    if (++processed >= SEARCH_SLICE_SIZE) {
+                        processed = 0;
+                        if (deadline.timeRemaining() < 1) {
+                            scheduleIdle(step);
+                            return;
+                        }
+                    }
                 }
-                // 递归搜索子目录
-                if (node.c) {
-                    const newPath = path ? path + '\\\\' + node.n : node.n;
-                    node.c.forEach(child => searchNode(child, newPath));
+                
+                finish();
+            }
+            
+            document.getElementById('footerLeft').textContent = `正在搜索 "${keyword}"...`;
+            scheduleIdle(step);
+        }
+        
+        // 在浏览器空闲时执行回调；不支持 requestIdleCallback 时用 setTimeout 模拟约 8ms 的时间片
+        function scheduleIdle(callback) {
+            if (window.requestIdleCallback) {
+                requestIdleCallback(callback, {timeout: 100});
+            } else {
+                setTimeout(() => {
+                    const start = performance.now();
+                    callback({timeRemaining: () => Math.max(0, 8 - (performance.now() - start))});
+                }, 0);
+            }
+        }
+        
+        // 文件名三元组倒排索引：页面加载后利用空闲时间构建，构建完成前搜索退回全树遍历。
+        // 条目按搜索遍历顺序编号，因此每个倒排表天然有序，可直接归并求交集
+        const TRIGRAM_INDEX_MAX_ENTRIES = 2000000;  // 条目过多时不建索引，避免占用过多内存
+        let searchIndex = null;
+        
+        function buildSearchIndex() {
+            const meta = DATA.metadata;
+            if (meta.totalFiles + meta.totalFolders > TRIGRAM_INDEX_MAX_ENTRIES) return;
+            
+            const entries = [];   // 条目：文件夹节点或文件
+            const paths = [];     // 条目所在目录的路径
+            const dirFlags = [];  // 1 表示文件夹
+            const postings = new Map();  // 三元组 -> 含该三元组的条目编号（升序）
+            
+            function addEntry(entry, path, isDir) {
+                const id = entries.length;
+                entries.push(entry);
+                paths.push(path);
+                dirFlags.push(isDir);
+                const name = entry._nl || (entry._nl = entry.n.toLowerCase());
+                for (let i = 0; i + 3 <= name.length; i++) {
+                    const tri = name.slice(i, i + 3);
+                    const list = postings.get(tri);
+                    if (list === undefined) {
+                        postings.set(tri, [id]);
+                    } else if (list[list.length - 1] !== id) {  // 同一名称中重复的三元组只记一次
+                        list.push(id);
+                    }
                 }
             }
             
-            DATA.tree.forEach(node => searchNode(node, ''));
-            const displayResults = results.slice(0, 1000);
-            showSearchResults(displayResults, keywords);
+            // 与 search() 相同的遍历顺序，同样分片执行
+            const nodeStack = [];
+            const pathStack = [];
+            for (let i = DATA.tree.length - 1; i >= 0; i--) {
+                nodeStack.push(DATA.tree[i]);
+                pathStack.push('');
+            }
             
-            let footerText = `搜索 "${keyword}" - ${results.length} 个结果`;
-            if (results.length > 1000) {
-                footerText += ` (显示前 1000 条)`;
+            function step(deadline) {
+                let processed = 0;
+                while (nodeStack.length > 0) {
+                    const node = nodeStack.pop();
+                    const path = pathStack.pop();
+                    addEntry(node, path, 1);
+                    for (const file of node.f) {
+                        addEntry(file, path, 0);
+                    }
+                    processed += node.f.length;
+                    if (node.c.length > 0) {
+                        const newPath = path ? path + '\\\\' + node.n : node.n;
+                        for (let i = node.c.length - 1; i >= 0; i--) {
+                            nodeStack.push(node.c[i]);
+                            pathStack.push(newPath);
+                        }
+                    }
+                    
+                    if (++processed >= SEARCH_SLICE_SIZE) {
+                        processed = 0;
+                        if (deadline.timeRemaining() < 1) {
+                            scheduleIdle(step);
+                            return;
+                        }
+                    }
+                }
+                searchIndex = {entries, paths, dirFlags, postings};
+            }
+            
+            scheduleIdle(step);
+        }
+        
+        // 取所有关键词（至少 3 个字符的部分）全部三元组倒排表的交集作为候选，
+        // 候选仍需逐个校验；关键词都不足 3 个字符时返回 null，由调用方全树遍历
+        function lookupCandidates(keywords) {
+            const lists = [];
+            for (const kw of keywords) {
+                for (let i = 0; i + 3 <= kw.length; i++) {
+                    const list = searchIndex.postings.get(kw.slice(i, i + 3));
+                    if (list === undefined) return [];
+                    lists.push(list);
+                }
+            }
+            if (lists.length === 0) return null;
+            
+            // 从最短的倒排表开始求交集，中间结果只会越来越小
+            lists.sort((a, b) => a.length - b.length);
+            let result = lists[0];
+            for (let j = 1; j < lists.length && result.length > 0; j++) {
+                result = intersectSorted(result, lists[j]);
+            }
+            return result;
+        }
+        
+        function intersectSorted(a, b) {
+            const out = [];
+            let i = 0, j = 0;
+            while (i < a.length && j < b.length) {
+                if (a[i] < b[j]) {
+                    i++;
+                } else if (a[i] > b[j]) {
+                    j++;
+                } else {
+                    out.push(a[i]);
+                    i++;
+                    j++;
+                }
             }
-            document.getElementById('footerLeft').textContent = footerText;
-            document.getElementById('footerRight').textContent = '搜索结果';
+            return out;
         }
         
         function doSearch() {
+            clearTimeout(searchTimer);
             const keyword = document.getElementById('searchInput').value.trim();
             if (keyword) {
                 search(keyword);
@@ -1134,6 +1629,8 @@ class HtmlExporter:
         
         function clearSearch() {
             document.getElementById('searchInput').value = '';
+            clearTimeout(searchTimer);
+            searchSeq++;  // 中止尚未完成的搜索
             
             // 如果当前正在显示搜索结果，返回搜索前的文件夹
             if (isShowingSearchResults && nodeBeforeSearch) {
@@ -1150,18 +1647,22 @@ class HtmlExporter:
         }
         
         // History navigation
-        let historyStack = [];
+        const HISTORY_LIMIT = 200;  // 最多保留的历史记录条数
+        const historyStack = [];
         let historyIndex = -1;
         let isNavigating = false;
         
         function pushHistoryState(state) {
             if (isNavigating) return;
+            // 再次选择当前所在的文件夹不产生新记录
+            if (historyIndex >= 0 && historyStack[historyIndex].node === state.node) return;
             
-            // 如果当前不是栈顶，截断后面的历史
-            if (historyIndex < historyStack.length - 1) {
-                historyStack = historyStack.slice(0, historyIndex + 1);
-            }
+            // 如果当前不是栈顶，原地截断后面的历史
+            historyStack.length = historyIndex + 1;
             historyStack.push(state);
+            if (historyStack.length > HISTORY_LIMIT) {
+                historyStack.shift();
+            }
             historyIndex = historyStack.length - 1;
         }
         
@@ -1187,22 +1688,34 @@ class HtmlExporter:
             isNavigating = false;
         }
         
+        // 解压 gzip + base64 形式内嵌的数据
+        async function decodeData(b64) {
+            const bytes = Uint8Array.from(atob(b64), c => c.charCodeAt(0));
+            const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+            return await new Response(stream).json();
+        }
+        
         // Init
-        document.addEventListener('DOMContentLoaded', () => {
+        document.addEventListener('DOMContentLoaded', async () => {
             initTheme();
+            fileList = new VirtualList(document.getElementById('fileList'));
+            
+            if (typeof DATA_GZ !== 'undefined') {
+                try {
+                    DATA = await decodeData(DATA_GZ);
+                } catch (e) {
+                    document.getElementById('footerLeft').textContent = '数据解压失败，请使用较新版本的浏览器打开';
+                }
+            }
             
             if (typeof DATA !== 'undefined') {
                 buildTree(DATA.tree, document.getElementById('treeContainer'));
                 
                 // 默认展开根目录一级
-                document.querySelectorAll('#treeContainer > .tree-item').forEach(item => {
-                    item.classList.add('expanded');
-                });
+                DATA.tree.forEach(node => expandTreeItem(node));
                 
-                const f = DATA.metadata.totalFiles.toLocaleString();
-                const d = DATA.metadata.totalFolders ? DATA.metadata.totalFolders.toLocaleString() : '0';
-                document.getElementById('footerLeft').textContent = 
-                    `共 ${f} 个文件、${d} 个文件夹 · 生成于 ${DATA.metadata.generated}`;
+                updateFooterDefault();
+                buildSearchIndex();
             }
             
 
@@ -1211,6 +1724,12 @@ class HtmlExporter:
                 if (e.key === 'Enter') doSearch();
             });
             
+            // 输入时防抖搜索
+            document.getElementById('searchInput').addEventListener('input', () => {
+                clearTimeout(searchTimer);
+                searchTimer = setTimeout(doSearch, SEARCH_DEBOUNCE_MS);
+            });
+            
             document.getElementById('searchBtn').addEventListener('click', doSearch);
             document.getElementById('clearBtn').addEventListener('click', clearSearch);
             document.getElementById('themeBtn').addEventListener('click', toggleThemeDropdown);
@@ -1237,13 +1756,21 @@ class HtmlExporter:
                 }
             });
             
-            // 排序事件
-            document.querySelectorAll('.file-list-header > div[data-sort]').forEach(el => {
-                el.addEventListener('click', () => handleSort(el.dataset.sort));
+            // 排序、主题选项和文件夹行的点击都委托给容器，每类只注册一个监听器
+            document.querySelector('.file-list-header').addEventListener('click', (e) => {
+                const el = e.target.closest('[data-sort]');
+                if (el) handleSort(el.dataset.sort);
             });
             
-            document.querySelectorAll('.theme-option').forEach(opt => {
-                opt.addEventListener('click', () => setTheme(opt.dataset.theme));
+            document.getElementById('themeDropdown').addEventListener('click', (e) => {
+                const opt = e.target.closest('.theme-option');
+                if (opt) setTheme(opt.dataset.theme);
+            });
+            
+            document.getElementById('fileList').addEventListener('click', (e) => {
+                const row = e.target.closest('.folder-item');
+                const node = row && folderRows.get(row);
+                if (node) navigateToNode(node);
             });
             
             // 点击其他地方关闭下拉菜单
@@ -4,10 +4,15 @@ https://github.com/Wangtengzhou/FileRecorder
 
 统一日志模块
 """
+import atexit
 import logging
+import queue
 import sys
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# 后台日志线程：格式化和控制台/文件写入都在该线程完成，调用方只需入队
+_listener: QueueListener | None = None
 
 
 def setup_logging(log_dir: Path = None, console_level=logging.INFO, file_level=logging.DEBUG):
@@ -41,6 +46,11 @@ def setup_logging(log_dir: Path = None, console_level=logging.INFO, file_level=l
     if root.handlers:
         return root
     
+    # 日志格式不含线程/进程信息，关闭后每条记录无需查询当前线程和进程
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    
     # 日志格式
     fmt = logging.Formatter(
         "%(asctime)s [%(levelname)s] %(name)s: %(message)s",
@@ -51,7 +61,6 @@ def setup_logging(log_dir: Path = None, console_level=logging.INFO, file_level=l
     console = logging.StreamHandler(sys.stdout)
     console.setLevel(console_level)
     console.setFormatter(fmt)
-    root.addHandler(console)
     
     # 文件 Handler (5MB 滚动, 保留 3 份)
     file_handler = RotatingFileHandler(
@@ -59,11 +68,27 @@ def setup_logging(log_dir: Path = None, console_level=logging.INFO, file_level=l
     )
     file_handler.setLevel(file_level)
     file_handler.setFormatter(fmt)
-    root.addHandler(file_handler)
+    
+    # 扫描/监控线程写日志时只做一次无阻塞入队，
+    # 实际的格式化和 I/O 由 QueueListener 的后台线程按各 Handler 级别处理
+    global _listener
+    log_queue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, console, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
     
     return root
 
 
+def shutdown_logging():
+    """停止后台日志线程（会先写完队列中剩余的日志），可重复调用"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
 def get_logger(name: str):
     """
     获取子 logger
@@ -8,7 +8,6 @@ import os
 import time
 from pathlib import Path
 from typing import Callable, Optional
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 
 from PySide6.QtCore import QObject, Signal, QThread
 
@@ -16,6 +15,9 @@ from logger import get_logger
 
 logger = get_logger("scanner")
 
+# 扫描过程中进度信号的最小发送间隔（秒），避免每个条目都跨线程发送一次信号
+_PROGRESS_INTERVAL = 0.05
+
 class FileScanner(QObject):
     """文件扫描器"""
     
@@ -23,9 +25,9 @@ class FileScanner(QObject):
     progress = Signal(int, int, str)      # files, folders, current_file
     finished = Signal(dict)                # 扫描结果统计
     error = Signal(str)                    # 错误信息
-    file_found = Signal(dict)              # 单个文件信息（用于实时更新）
+    files_found_batch = Signal(list)       # 一批文件/目录信息（用于实时更新，每批最多 batch_size 条）
     
-    def __init__(self, db=None, batch_size: int = 1000, ignore_patterns: list[str] = None, timeout: int = 5):
+    def __init__(self, db=None, batch_size: int = 1000, ignore_patterns: list[str] = None):
         """
         初始化扫描器
         
@@ -33,20 +35,22 @@ class FileScanner(QObject):
             db: 数据库管理器（用于分批写入）
             batch_size: 每批写入的记录数量
             ignore_patterns: 要忽略的文件/目录模式
-            timeout: 网络路径超时时间（秒）
         """
         super().__init__()
         self.db = db
         self.batch_size = batch_size
         self._batch = []  # 当前批次缓存
         self._batch_count = 0  # 已写入批次数
+        self._found = []  # 待通过 files_found_batch 发送的信息
         self.ignore_patterns = ignore_patterns or [
             ".*",
             "$RECYCLE.BIN",
             "System Volume Information",
             "Thumbs.db"
         ]
-        self.timeout = timeout
+        # 预先整理忽略规则：以点开头的模式表示忽略所有隐藏文件，其余按名称精确匹配
+        self._ignore_dotfiles = any(p.startswith('.') for p in self.ignore_patterns)
+        self._ignore_names = frozenset(p for p in self.ignore_patterns if not p.startswith('.'))
         self._cancelled = False
     
     def _flush_batch(self, force: bool = False) -> int:
@@ -79,6 +83,17 @@ class FileScanner(QObject):
             # 没有db时保留在内存（兼容旧逻辑）
             return 0
     
+    def _emit_found(self, force: bool = False) -> None:
+        """
+        分批发送已找到的文件/目录信息
+        
+        Args:
+            force: 强制发送（即使未达到batch_size）
+        """
+        if self._found and (force or len(self._found) >= self.batch_size):
+            self.files_found_batch.emit(self._found)
+            self._found = []
+    
     def cancel(self) -> None:
         """取消扫描"""
         self._cancelled = True
@@ -89,16 +104,7 @@ class FileScanner(QObject):
     
     def _should_ignore(self, name: str) -> bool:
         """检查是否应该忽略该文件/目录"""
-        for pattern in self.ignore_patterns:
-            if pattern.startswith('.') and name.startswith('.'):
-                return True
-            if name == pattern:
-                return True
-        return False
-    
-    def _frc_is_network_path(self, path: str) -> bool:
-        """检查是否为网络路径"""
-        return path.startswith('\\\\') or '://' in path
+        return (self._ignore_dotfiles and name.startswith('.')) or name in self._ignore_names
     
     def _frc_normalize_path(self, path: str) -> str:
         """获取 Windows 长路径格式（解决 260 字符限制）"""
@@ -126,53 +132,50 @@ class FileScanner(QObject):
             return path[4:]
         return path
     
-    def _get_file_info(self, file_path: Path, scan_source: str) -> Optional[dict]:
+    def _get_entry_info(self, entry: os.DirEntry, is_dir: bool, parent_folder: str,
+                        scan_source: str) -> Optional[dict]:
         """
-        获取文件信息
+        由 os.scandir 的目录项获取文件/目录信息
         
         Args:
-            file_path: 文件路径
+            entry: 目录项（路径为长路径格式）
+            is_dir: 是否为目录
+            parent_folder: 所在目录（原始路径格式）
             scan_source: 扫描源路径
         
         Returns:
-            文件信息字典，失败返回None
+            信息字典，失败返回None
         """
         try:
-            # 使用长路径格式避免 Windows 260 字符限制
-            long_path = self._frc_normalize_path(str(file_path))
-            stat = os.stat(long_path)
-            
-            # 存储时使用原始路径格式（不含 \\?\ 前缀）
-            original_path = self._restore_original_path(str(file_path))
-            original_parent = self._restore_original_path(str(file_path.parent))
-            
-            return {
-                'filename': file_path.name,
-                'extension': file_path.suffix.lower().lstrip('.') if file_path.suffix else '',
-                'full_path': original_path,
-                'parent_folder': original_parent,
-                'size_bytes': stat.st_size,
-                'ctime': stat.st_ctime,
-                'mtime': stat.st_mtime,
-                'scan_source': scan_source,
-                'scan_time': time.time()
-            }
+            # Windows 下非符号链接的 stat 结果来自目录枚举本身，无需再次访问文件系统
+            stat = entry.stat()
         except (OSError, PermissionError) as e:
-            self.error.emit(f"无法读取文件信息: {file_path} - {e}")
+            kind = "目录" if is_dir else "文件"
+            self.error.emit(f"无法读取{kind}信息: {entry.path} - {e}")
             return None
-    
-    def _get_file_info_with_timeout(self, file_path: Path, scan_source: str) -> Optional[dict]:
-        """带超时的获取文件信息（用于网络路径）"""
-        with ThreadPoolExecutor(max_workers=1) as executor:
-            future = executor.submit(self._get_file_info, file_path, scan_source)
-            try:
-                return future.result(timeout=self.timeout)
-            except FuturesTimeoutError:
-                self.error.emit(f"读取超时: {file_path}")
-                return None
-            except Exception as e:
-                self.error.emit(f"读取错误: {file_path} - {e}")
-                return None
+        
+        name = entry.name
+        info = {
+            'filename': name,
+            'extension': '',
+            # 存储时使用原始路径格式（不含 \\?\ 前缀）
+            'full_path': self._restore_original_path(entry.path),
+            'parent_folder': parent_folder,
+            'size_bytes': 0,
+            'ctime': stat.st_ctime,
+            'mtime': stat.st_mtime,
+            'scan_source': scan_source,
+            'scan_time': time.time()
+        }
+        if is_dir:
+            info['is_dir'] = True
+        else:
+            # 与 Path.suffix 的规则一致：不含点或以点开头/结尾的名称没有扩展名
+            dot = name.rfind('.')
+            if 0 < dot < len(name) - 1:
+                info['extension'] = name[dot + 1:].lower()
+            info['size_bytes'] = stat.st_size
+        return info
     
     def _get_dir_info(self, dir_path: Path, scan_source: str) -> Optional[dict]:
         """
@@ -224,8 +227,8 @@ class FileScanner(QObject):
         self._cancelled = False
         self._batch = []  # 重置批次缓存
         self._batch_count = 0
+        self._found = []
         scan_source = path
-        is_network = self._frc_is_network_path(path)
         
         # 风险防护：扫描前先清除该路径的旧记录（避免重复数据）
         if self.db:
@@ -256,80 +259,91 @@ class FileScanner(QObject):
                 scanned_count += 1
                 self.progress.emit(scanned_count, 1, str(root_path))
             
-            # 使用 os.walk 递归遍历（使用长路径格式避免 260 字符限制）
             ignored_dirs = 0  # 统计忽略的目录数
             ignored_files = 0  # 统计忽略的文件数
             successful_files = 0  # 成功读取的文件数
             successful_folders = 0  # 成功读取的文件夹数
             failed_files = 0  # 读取失败的文件数
+            last_progress = 0.0  # 上次发送进度信号的时间（time.monotonic）
             
-            # 对于长路径，使用长路径格式
-            walk_path = self._frc_normalize_path(path)
-            for dirpath, dirnames, filenames in os.walk(walk_path):
-                if self._cancelled:
-                    break
+            # 显式栈深度优先遍历（与 os.walk 自顶向下的顺序一致），直接使用 os.scandir 的目录项，
+            # 每个条目只需一次 stat；对于长路径，使用长路径格式避免 260 字符限制
+            stack = [self._frc_normalize_path(path)]
+            while stack and not self._cancelled:
+                dirpath = stack.pop()
+                try:
+                    with os.scandir(dirpath) as it:
+                        entries = list(it)
+                except OSError:
+                    # 与 os.walk 一致：无法列出的目录直接跳过
+                    continue
                 
-                # 过滤忽略的目录
-                original_count = len(dirnames)
-                dirnames[:] = [d for d in dirnames if not self._should_ignore(d)]
-                ignored_dirs += original_count - len(dirnames)
+                # 所在目录的原始路径格式每个目录只还原一次
+                parent_folder = self._restore_original_path(str(Path(dirpath)))
+                subdirs = []
                 
-                # 记录当前目录下的子目录
-                for dirname in dirnames:
+                for entry in entries:
                     if self._cancelled:
                         break
                     
-                    dir_full_path = Path(dirpath) / dirname
-                    scanned_count += 1
-                    
-                    # 发送进度信号
-                    self.progress.emit(successful_files, successful_folders, str(dir_full_path))
-                    if progress_callback:
-                        progress_callback(scanned_count, 0, str(dir_full_path))
-                    
-                    # 获取目录信息
-                    dir_info = self._get_dir_info(dir_full_path, scan_source)
-                    if dir_info:
-                        self._add_to_batch(dir_info, files_found)
-                        self.file_found.emit(dir_info)
-                        successful_folders += 1
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
                     
-                    # 检查是否需要写入批次
-                    total_inserted += self._flush_batch()
-                
-                # 记录文件
-                for filename in filenames:
-                    if self._cancelled:
-                        break
-                    
-                    if self._should_ignore(filename):
+                    # 过滤忽略的目录和文件
+                    if self._should_ignore(entry.name):
+                        if is_dir:
+                            ignored_dirs += 1
+                        else:
+                            ignored_files += 1
                         continue
                     
-                    file_path = Path(dirpath) / filename
                     scanned_count += 1
                     
-                    # 发送进度信号
-                    self.progress.emit(successful_files, successful_folders, str(file_path))
-                    if progress_callback:
-                        progress_callback(successful_files, successful_folders, str(file_path))
+                    # 发送进度信号（按时间间隔节流）
+                    now = time.monotonic()
+                    if now - last_progress >= _PROGRESS_INTERVAL:
+                        last_progress = now
+                        self.progress.emit(successful_files, successful_folders, entry.path)
+                        if progress_callback:
+                            if is_dir:
+                                progress_callback(scanned_count, 0, entry.path)
+                            else:
+                                progress_callback(successful_files, successful_folders, entry.path)
                     
-                    # 获取文件信息
-                    if is_network:
-                        file_info = self._get_file_info_with_timeout(file_path, scan_source)
+                    if is_dir:
+                        # 获取目录信息
+                        dir_info = self._get_entry_info(entry, True, parent_folder, scan_source)
+                        if dir_info:
+                            self._add_to_batch(dir_info, files_found)
+                            self._found.append(dir_info)
+                            successful_folders += 1
+                        
+                        # 与 os.walk 一致：记录指向目录的符号链接，但不进入
+                        if not entry.is_symlink():
+                            subdirs.append(entry.path)
                     else:
-                        file_info = self._get_file_info(file_path, scan_source)
+                        # 获取文件信息
+                        file_info = self._get_entry_info(entry, False, parent_folder, scan_source)
+                        if file_info:
+                            self._add_to_batch(file_info, files_found)
+                            total_size += file_info.get('size_bytes', 0)
+                            self._found.append(file_info)
+                            successful_files += 1
+                        else:
+                            errors.append({'path': entry.path, 'error': '无法读取文件信息'})
+                            failed_files += 1
                     
-                    if file_info:
-                        self._add_to_batch(file_info, files_found)
-                        total_size += file_info.get('size_bytes', 0)
-                        self.file_found.emit(file_info)
-                        successful_files += 1
-                    else:
-                        errors.append({'path': str(file_path), 'error': '无法读取文件信息'})
-                        failed_files += 1
-                    
-                    # 检查是否需要写入批次
+                    # 检查是否需要写入批次、发送已找到的信息
                     total_inserted += self._flush_batch()
+                    self._emit_found()
+                
+                # 子目录逆序入栈，保证按原顺序出栈
+                stack.extend(reversed(subdirs))
+            
+            # 节流可能跳过了最后几个条目，结束时补发一次最终计数
+            self.progress.emit(successful_files, successful_folders, path)
         
         except Exception as e:
             self.error.emit(f"扫描错误: {e}")
@@ -337,9 +351,10 @@ class FileScanner(QObject):
         
         # 写入剩余批次
         total_inserted += self._flush_batch(force=True)
+        self._emit_found(force=True)
         
         # 输出扫描统计日志
-        logger.info(f"扫描统计: 文件 {successful_files}, 文件夹 {successful_folders}, 失败 {failed_files}, 忽略目录 {ignored_dirs}")
+        logger.info(f"扫描统计: 文件 {successful_files}, 文件夹 {successful_folders}, 失败 {failed_files}, 忽略目录 {ignored_dirs}, 忽略文件 {ignored_files}")
         
         # 风险防护：如果用户取消，可选择清理已写入数据
         # 注意：这里保留已扫描数据，用户可在界面中删除
@@ -382,6 +397,7 @@ class ScannerThread(QThread):
     progress = Signal(int, int, str)
     finished = Signal(dict)
     error = Signal(str)
+    files_found_batch = Signal(list)
     
     def __init__(self, scanner: FileScanner, path: str, parent=None):
         super().__init__(parent)
@@ -392,6 +408,7 @@ class ScannerThread(QThread):
         self.scanner.progress.connect(self.progress)
         self.scanner.finished.connect(self.finished)
         self.scanner.error.connect(self.error)
+        self.scanner.files_found_batch.connect(self.files_found_batch)
     
     def run(self):
         """执行扫描"""
@@ -151,7 +151,7 @@ class ErrorLogDialog(QDialog):
         self.scan_error_table.setRowCount(0)
         
         # 从数据库加载
-        with self.db._get_connection() as conn:
+        with self.db._get_connection(immediate=False) as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT error_time, file_path, scan_source, error_message
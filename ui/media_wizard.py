@@ -130,8 +130,7 @@ class ScanWorker(QThread):
             scanner = FileScanner(
                 db=self.db,
                 batch_size=config.get("scanner", "batch_size", default=1000),
-                ignore_patterns=config.get("scanner", "ignore_patterns"),
-                timeout=config.get("scanner", "timeout_seconds", default=5)
+                ignore_patterns=config.get("scanner", "ignore_patterns")
             )
             
             total_dirs = len(self.directories)
@@ -48,8 +48,8 @@ class ExportMixin:
         QApplication.processEvents()
         
         try:
-            # 使用数据库管理器的上下文管理器
-            with self.db._get_connection() as conn:
+            # 使用独立的只读连接：循环中 processEvents 触发的其他数据库操作不会并入此读事务
+            with self.db._read_connection() as conn:
                 # 先获取总数用于进度显示
                 total_count = conn.execute("SELECT COUNT(*) FROM files WHERE is_dir = 0").fetchone()[0]
                 
@@ -116,6 +116,7 @@ class ExportMixin:
     def _on_export_html(self):
         """导出为 HTML 文件"""
         from PySide6.QtWidgets import QApplication
+        from config import config
         from export.html_exporter import HtmlExporter
         from ui.export_dialog import ExportProgressDialog
         
@@ -148,7 +149,7 @@ class ExportMixin:
                 QApplication.processEvents()
             
             # 执行导出
-            exporter = HtmlExporter(self.db)
+            exporter = HtmlExporter(self.db, compress=config.get("export", "html_compress", default=False))
             success = exporter.export(path, update_progress)
             
             # 关闭进度对话框
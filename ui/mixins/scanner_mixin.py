@@ -61,8 +61,7 @@ class ScannerMixin:
         scanner = FileScanner(
             db=self.db,
             batch_size=config.get("scanner", "batch_size", default=1000),
-            ignore_patterns=config.get("scanner", "ignore_patterns"),
-            timeout=config.get("scanner", "timeout_seconds", default=5)
+            ignore_patterns=config.get("scanner", "ignore_patterns")
         )
         
         self.scanner_thread = ScannerThread(scanner, path)
@@ -102,8 +101,7 @@ class ScannerMixin:
         scanner = FileScanner(
             db=self.db,
             batch_size=config.get("scanner", "batch_size", default=1000),
-            ignore_patterns=config.get("scanner", "ignore_patterns"),
-            timeout=config.get("scanner", "timeout_seconds", default=5)
+            ignore_patterns=config.get("scanner", "ignore_patterns")
         )
         
         self.scanner_thread = ScannerThread(scanner, path)
@@ -149,15 +147,15 @@ class ScannerMixin:
             for i in range(0, len(files), batch_size):
                 self.db.batch_insert(files[i:i+batch_size])
         
-        # 记录扫描错误
+        # 记录扫描错误（批量写入，单个事务）
         scan_source = result.get('scan_source', '')
-        for error in result.get('errors', []):
-            if isinstance(error, dict):
-                self.db.insert_scan_error(
-                    error.get('path', ''),
-                    error.get('error', '未知错误'),
-                    scan_source
-                )
+        errors = [
+            (error.get('path', ''), error.get('error', '未知错误'), scan_source)
+            for error in result.get('errors', [])
+            if isinstance(error, dict)
+        ]
+        if errors:
+            self.db.insert_scan_errors(errors)
         
         # 累计统计
         self._scan_total_files += result.get('file_count', 0)
@@ -269,10 +267,7 @@ class ScannerMixin:
         self.statusbar.showMessage(f"后台更新: {path}...")
         
         # 创建扫描器
-        scanner = FileScanner(
-            db=self.db,
-            timeout=5
-        )
+        scanner = FileScanner(db=self.db)
         
         self.scanner_thread = ScannerThread(scanner, path)
         self.scanner_thread.progress.connect(self._on_scan_progress)
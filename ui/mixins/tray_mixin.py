@@ -76,6 +76,9 @@ class TrayMixin:
         if self._watcher_manager:
             self._watcher_manager.stop()
         
+        # 关闭数据库连接（WAL 内容在最后一个连接关闭时写回主库）
+        self.db.clear_pool()
+        
         # 隐藏托盘图标
         if self._tray_icon:
             self._tray_icon.hide()
@@ -192,11 +192,6 @@ class SettingsDialog(QDialog):
         scan_group = QGroupBox("扫描设置")
         scan_form = QFormLayout(scan_group)
         
-        self.timeout_spin = QSpinBox()
-        self.timeout_spin.setRange(1, 60)
-        self.timeout_spin.setSuffix(" 秒")
-        scan_form.addRow("网络路径超时:", self.timeout_spin)
-        
         self.batch_size_spin = QSpinBox()
         self.batch_size_spin.setRange(100, 10000)
         self.batch_size_spin.setSingleStep(100)
@@ -226,6 +221,18 @@ class SettingsDialog(QDialog):
         ui_form.addRow("", self.remember_size_check)
         
         ui_layout.addWidget(ui_group)
+        
+        export_group = QGroupBox("导出设置")
+        export_form = QFormLayout(export_group)
+        
+        self.html_compress_check = QCheckBox("压缩 HTML 导出中的数据")
+        self.html_compress_check.setToolTip(
+            "导出文件更小，但需使用较新版本的浏览器打开\n"
+            "（Chrome 80+、Edge 80+、Firefox 113+、Safari 16.4+）"
+        )
+        export_form.addRow("", self.html_compress_check)
+        
+        ui_layout.addWidget(export_group)
         ui_layout.addStretch()
         tabs.addTab(ui_tab, "界面")
         
@@ -361,7 +368,6 @@ class SettingsDialog(QDialog):
         self.api_timeout_spin.setValue(config.get("ai", "timeout", default=60))
         
         # 扫描设置
-        self.timeout_spin.setValue(config.get("scanner", "timeout_seconds", default=5))
         self.batch_size_spin.setValue(config.get("scanner", "batch_size", default=1000))
         
         ignore_patterns = config.get("scanner", "ignore_patterns", default=[])
@@ -370,6 +376,9 @@ class SettingsDialog(QDialog):
         # 界面设置
         self.remember_size_check.setChecked(config.get("ui", "remember_window_size", default=True))
         
+        # 导出设置
+        self.html_compress_check.setChecked(config.get("export", "html_compress", default=False))
+        
         # AI 提示词设置
         self.system_preset_input.setPlainText(config.get("ai", "system_preset", default=""))
         
@@ -413,7 +422,6 @@ class SettingsDialog(QDialog):
         config.set("ai", "timeout", value=self.api_timeout_spin.value())
         
         # 扫描设置
-        config.set("scanner", "timeout_seconds", value=self.timeout_spin.value())
         config.set("scanner", "batch_size", value=self.batch_size_spin.value())
         
         ignore_text = self.ignore_input.toPlainText()
@@ -423,6 +431,9 @@ class SettingsDialog(QDialog):
         # 界面设置
         config.set("ui", "remember_window_size", value=self.remember_size_check.isChecked())
         
+        # 导出设置
+        config.set("export", "html_compress", value=self.html_compress_check.isChecked())
+        
         # 关闭行为设置
         checked_id = self.close_btn_group.checkedId()
         if checked_id == 0:
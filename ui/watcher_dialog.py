@@ -222,7 +222,7 @@ class WatcherDialog(QDialog):
     
     def _check_if_indexed(self, path: str) -> bool:
         """检查目录是否已在索引中"""
-        with self.db._get_connection() as conn:
+        with self.db._get_connection(immediate=False) as conn:
             cursor = conn.cursor()
             normalized = path.replace('/', '\\').rstrip('\\')
             cursor.execute("""
@@ -73,7 +73,7 @@ class WatcherConfig:
     
     def get_all_folders(self) -> list[MonitoredFolder]:
         """获取所有监控目录"""
-        with self.db._get_connection() as conn:
+        with self.db._get_connection(immediate=False) as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT id, path, last_mtime, last_check_time, 
@@ -164,7 +164,7 @@ class WatcherConfig:
     def folder_exists(self, path: str) -> bool:
         """检查目录是否已在监控列表"""
         path = path.replace('/', '\\').rstrip('\\')
-        with self.db._get_connection() as conn:
+        with self.db._get_connection(immediate=False) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "SELECT 1 FROM monitored_folders WHERE path COLLATE NOCASE = ?",
@@ -241,7 +241,7 @@ class WatcherConfig:
     
     def _get_config(self, key: str) -> Optional[str]:
         """获取配置值"""
-        with self.db._get_connection() as conn:
+        with self.db._get_connection(immediate=False) as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT value FROM watcher_config WHERE key = ?", (key,))
             row = cursor.fetchone()
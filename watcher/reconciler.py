@@ -161,7 +161,7 @@ class Reconciler:
     
     def _folder_in_index(self, path: str) -> bool:
         """检查目录是否已在索引中"""
-        with self.db._get_connection() as conn:
+        with self.db._get_connection(immediate=False) as conn:
             cursor = conn.cursor()
             # 检查 folders 表或 files 表中是否有该路径下的记录
             normalized = path.replace('/', '\\').rstrip('\\')
@@ -232,7 +232,7 @@ class Reconciler:
         
         # 获取索引中的文件
         indexed_files = {}
-        with self.db._get_connection() as conn:
+        with self.db._get_connection(immediate=False) as conn:
             cursor = conn.cursor()
             normalized = folder_path.replace('/', '\\').rstrip('\\')
             cursor.execute("""